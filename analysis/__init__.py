@@ -1,4 +1,5 @@
 from .threshold import ThresholdAnalyzer
 from .processor import DataProcessor
+from .streaming import StreamingThresholdAnalyzer, ChunkAligner
 
-__all__ = ['ThresholdAnalyzer', 'DataProcessor']
\ No newline at end of file
+__all__ = ['ThresholdAnalyzer', 'DataProcessor', 'StreamingThresholdAnalyzer', 'ChunkAligner']
\ No newline at end of file
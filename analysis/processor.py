@@ -1,9 +1,21 @@
 import logging
 import numpy as np
-from typing import Dict, Tuple
+from typing import Dict, Optional, Tuple
 
 from core.types import ChannelConfig
 
+def window_slice(timestamps: np.ndarray, start_time: Optional[float] = None,
+                 end_time: Optional[float] = None) -> Tuple[int, int]:
+    """
+    Returns (first, last) such that timestamps[first:last] are the sorted
+    timestamps with start_time <= t <= end_time.
+    """
+    first = 0 if start_time is None else int(
+        np.searchsorted(timestamps, start_time, side='left'))
+    last = len(timestamps) if end_time is None else int(
+        np.searchsorted(timestamps, end_time, side='right'))
+    return first, max(first, last)
+
 class DataProcessor:
     """
     Processes raw measurement data before analysis.
@@ -13,36 +25,57 @@ class DataProcessor:
         self.logger = logging.getLogger(__name__)
 
     def process_channel(self, data: np.ndarray, timestamps: np.ndarray, 
-                       config: ChannelConfig) -> Tuple[np.ndarray, np.ndarray]:
+                       config: ChannelConfig, in_place: bool = False,
+                       out: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
         """
         Applies all necessary processing to channel data.
         
+        The time window is applied first and returns views, so scaling
+        only touches the selected samples.
+        
         Args:
             data: Raw measurement data
             timestamps: Corresponding timestamps
             config: Channel configuration
+            in_place: Scale writeable floating point data in place
+            out: Buffer receiving the scaled data, at least as long as the
+                windowed data
             
         Returns:
             Tuple of (processed_data, processed_timestamps)
         """
         try:
-            # Apply scaling if specified
-            if config.scaling != 1.0:
-                data = self._apply_scaling(data, config.scaling)
-                
             # Apply time window if specified
             if config.start_time is not None or config.end_time is not None:
                 data, timestamps = self._apply_time_window(
                     data, timestamps, config.start_time, config.end_time)
                 
+            # Apply scaling if specified
+            if config.scaling != 1.0:
+                data = self._apply_scaling(data, config.scaling, in_place, out)
+                
             return data, timestamps
             
         except Exception as e:
             self.logger.error(f"Processing failed for {config.name}: {str(e)}")
             raise
 
-    def _apply_scaling(self, data: np.ndarray, scaling: float) -> np.ndarray:
-        """Applies scaling factor to data."""
+    def _apply_scaling(self, data: np.ndarray, scaling: float, in_place: bool = False,
+                       out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Applies scaling factor to data.
+        
+        Floating point data keeps its dtype (float32 stays float32);
+        integer data is promoted to float64. Without in_place or out, a
+        new array is returned.
+        """
+        if out is not None:
+            target = out[:len(data)]
+            np.multiply(data, scaling, out=target)
+            return target
+        if in_place and data.dtype.kind == 'f' and data.flags.writeable:
+            np.multiply(data, scaling, out=data)
+            return data
         return data * scaling
 
     def _apply_time_window(self, data: np.ndarray, timestamps: np.ndarray,
@@ -51,17 +84,14 @@ class DataProcessor:
         """
         Selects data within specified time window.
         
+        Timestamps are sorted, so the window is found by binary search and
+        returned as views without copying.
+        
         Returns:
             Tuple of (windowed_data, windowed_timestamps)
         """
-        mask = np.ones(len(timestamps), dtype=bool)
-        
-        if start_time is not None:
-            mask &= (timestamps >= start_time)
-        if end_time is not None:
-            mask &= (timestamps <= end_time)
-            
-        return data[mask], timestamps[mask]
+        first, last = window_slice(timestamps, start_time, end_time)
+        return data[first:last], timestamps[first:last]
 
     def interpolate_channel(self, data: np.ndarray, timestamps: np.ndarray, 
                           target_timestamps: np.ndarray) -> np.ndarray:
@@ -71,4 +101,29 @@ class DataProcessor:
         Returns:
             Interpolated data array
         """
-        return np.interp(target_timestamps, timestamps, data)
\ No newline at end of file
+        return np.interp(target_timestamps, timestamps, data)
+
+    def hold_channel(self, data: np.ndarray, timestamps: np.ndarray,
+                     target_timestamps: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Aligns a state channel (e.g. a test flag) to target timestamps by
+        zero-order hold: each target takes the last sample at or before it.
+        
+        Returns:
+            Tuple of (held_values, valid), where valid is False for targets
+            before the first sample
+        """
+        index = np.searchsorted(timestamps, target_timestamps, side='right') - 1
+        valid = index >= 0
+        if not len(data):
+            return np.zeros(len(target_timestamps), dtype=data.dtype), valid
+        return data[np.maximum(index, 0)], valid
+
+    def evaluation_mask(self, flag_data: np.ndarray, flag_timestamps: np.ndarray,
+                        target_timestamps: np.ndarray, test_flag: int) -> np.ndarray:
+        """
+        Boolean mask of target timestamps at which the held test flag
+        channel equals test_flag.
+        """
+        values, valid = self.hold_channel(flag_data, flag_timestamps, target_timestamps)
+        return valid & (values == test_flag)
\ No newline at end of file
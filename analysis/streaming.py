@@ -0,0 +1,188 @@
+import logging
+import math
+import numpy as np
+from typing import Iterable, Optional, Tuple
+
+from core.types import ChannelConfig, AnalysisResult
+from .threshold import ThresholdAnalyzer
+
+# (data, timestamps) of one chunk of consecutive records
+Chunk = Tuple[np.ndarray, np.ndarray]
+
+class ChunkAligner:
+    """
+    Aligns a chunked reference channel (e.g. a setpoint or test flag
+    channel) to the timestamps of another chunk stream.
+
+    Only the reference samples needed to bracket the requested timestamps
+    are buffered, so memory stays bounded by the chunk size. Results are
+    identical to DataProcessor.interpolate_channel and
+    DataProcessor.hold_channel over the complete reference channel.
+    """
+    def __init__(self, chunks: Iterable[Chunk]):
+        self._chunks = iter(chunks)
+        self._data: Optional[np.ndarray] = None
+        self._timestamps = np.empty(0)
+        self._exhausted = False
+
+    def interpolate(self, timestamps: np.ndarray) -> np.ndarray:
+        """Returns reference values linearly interpolated at timestamps."""
+        if not len(timestamps):
+            return np.empty(0)
+
+        # Read ahead until the buffer reaches the last requested time
+        self._fill(lambda last: last < timestamps[-1])
+        if not len(self._timestamps):
+            raise ValueError("Reference channel has no samples")
+
+        values = np.interp(timestamps, self._timestamps, self._data)
+        self._trim(timestamps[-1])
+        return values
+
+    def hold(self, timestamps: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Returns (values, valid): the last reference sample at or before
+        each timestamp (zero-order hold), and False where there is none.
+        """
+        # Read past the last requested time, so that samples sharing that
+        # timestamp are all in the buffer
+        self._fill(lambda last: last <= timestamps[-1] if len(timestamps) else False)
+
+        index = np.searchsorted(self._timestamps, timestamps, side='right') - 1
+        valid = index >= 0
+        if self._data is None or not len(self._data):
+            dtype = np.float64 if self._data is None else self._data.dtype
+            values = np.zeros(len(timestamps), dtype=dtype)
+        else:
+            values = self._data[np.maximum(index, 0)]
+
+        if len(timestamps):
+            self._trim(timestamps[-1])
+        return values, valid
+
+    def _fill(self, needs_more) -> None:
+        """Appends reference chunks while needs_more(last buffered timestamp)."""
+        while not self._exhausted and (
+                not len(self._timestamps) or needs_more(self._timestamps[-1])):
+            try:
+                data, chunk_timestamps = next(self._chunks)
+            except StopIteration:
+                self._exhausted = True
+                break
+            self._data = data if self._data is None else np.concatenate((self._data, data))
+            self._timestamps = np.concatenate((self._timestamps, chunk_timestamps))
+
+    def _trim(self, end: float) -> None:
+        # Keep the last sample at or before the end of this chunk, as the
+        # left bracket for the next one
+        keep = max(int(np.searchsorted(self._timestamps, end, side='right')) - 1, 0)
+        self._data = self._data[keep:]
+        self._timestamps = self._timestamps[keep:]
+
+class StreamingThresholdAnalyzer:
+    """
+    Runs threshold analysis chunk by chunk.
+
+    Segments are accumulated across chunks; an excursion that is still
+    open at the end of a chunk is merged with the one starting the next
+    chunk. The result matches ThresholdAnalyzer.analyze on the
+    concatenated data exactly.
+    """
+    def __init__(self, threshold_analyzer: Optional[ThresholdAnalyzer] = None):
+        self.logger = logging.getLogger(__name__)
+        self.threshold_analyzer = threshold_analyzer or ThresholdAnalyzer()
+
+    def analyze(self, chunks: Iterable[Chunk], config: ChannelConfig,
+                setpoint: Optional[ChunkAligner] = None,
+                test_flag: Optional[ChunkAligner] = None) -> AnalysisResult:
+        """
+        Analyzes a stream of processed chunks against thresholds.
+
+        Args:
+            chunks: (data, timestamps) chunks in time order
+            config: Channel configuration
+            setpoint: Aligner over the setpoint channel, required when
+                config.setpoint_channel is set
+            test_flag: Aligner over the test flag channel; only samples
+                where it equals config.test_flag are evaluated
+
+        Returns:
+            AnalysisResult for the complete stream
+        """
+        self.logger.info(f"Analyzing channel (streaming): {config.name}")
+        if config.setpoint_channel and setpoint is None:
+            raise ValueError(f"No data for setpoint channel {config.setpoint_channel}")
+
+        analyzer = self.threshold_analyzer
+        result = AnalysisResult(config.name)
+        open_segment = None
+        # Durations of closed evaluated runs, and the start time of a run
+        # still open at the end of the previous chunk
+        durations = []
+        open_run_start = None
+
+        for data, timestamps in chunks:
+            if not len(data):
+                continue
+            if result.start_time is None:
+                result.start_time = float(timestamps[0])
+            result.end_time = float(timestamps[-1])
+
+            setpoint_data = setpoint.interpolate(timestamps) if config.setpoint_channel else None
+            if test_flag is not None:
+                values, valid = test_flag.hold(timestamps)
+                evaluation_mask = valid & (values == config.test_flag)
+            else:
+                evaluation_mask = np.ones(len(timestamps), dtype=bool)
+
+            result.evaluated_samples += int(np.count_nonzero(evaluation_mask))
+            starts, stops = analyzer._run_bounds(evaluation_mask)
+            run_starts = timestamps[starts]
+            if open_run_start is not None:
+                if evaluation_mask[0]:
+                    run_starts[0] = open_run_start
+                else:
+                    durations.append(timestamps[0] - open_run_start)
+                open_run_start = None
+            if evaluation_mask[-1]:
+                open_run_start = run_starts[-1]
+                run_starts, stops = run_starts[:-1], stops[:-1]
+            durations.extend((timestamps[stops] - run_starts).tolist())
+
+            lower_bound, upper_bound = analyzer._bounds(config, setpoint_data)
+            mask = analyzer._violation_mask(data, lower_bound, upper_bound, evaluation_mask)
+            segments = analyzer._segments_from_mask(
+                mask, data, timestamps, lower_bound, upper_bound)
+
+            if open_segment is not None:
+                if mask[0]:
+                    segments[:1] = self._merge(open_segment, segments[:1])
+                else:
+                    result.add_segments(open_segment)
+                open_segment = None
+
+            if mask[-1]:
+                open_segment = segments[-1:].copy()
+                segments = segments[:-1]
+            result.add_segments(segments)
+
+        if open_segment is not None:
+            result.add_segments(open_segment)
+        if open_run_start is not None:
+            durations.append(result.end_time - open_run_start)
+        result.evaluated_duration = math.fsum(durations)
+
+        result.max_deviation = analyzer._calculate_max_deviation(result.segments)
+        result.passed = len(result.segments) == 0
+        return result
+
+    def _merge(self, head: np.ndarray, tail: np.ndarray) -> np.ndarray:
+        """Joins a segment left open by the previous chunk with its continuation."""
+        merged = head.copy()
+        merged['end_time'] = tail['end_time']
+        merged['sample_count'] += tail['sample_count']
+        # The earlier sample wins ties, as in the in-memory engine
+        if tail['peak_deviation'][0] > merged['peak_deviation'][0]:
+            for field in ('peak_deviation', 'peak_timestamp', 'peak_value'):
+                merged[field] = tail[field]
+        return merged
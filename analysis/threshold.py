@@ -1,8 +1,9 @@
 import logging
+import math
 import numpy as np
-from typing import Dict, List, Tuple
+from typing import Optional, Tuple, Union
 
-from core.types import ChannelConfig, AnalysisResult
+from core.types import ChannelConfig, AnalysisResult, SEGMENT_DTYPE
 
 class ThresholdAnalyzer:
     """
@@ -12,88 +13,194 @@ class ThresholdAnalyzer:
     def __init__(self):
         self.logger = logging.getLogger(__name__)
 
-    def analyze(self, channel_data: np.ndarray, timestamps: np.ndarray, 
-                config: ChannelConfig) -> AnalysisResult:
+    def analyze(self, channel_data: np.ndarray, timestamps: np.ndarray,
+                config: ChannelConfig,
+                setpoint_data: Optional[np.ndarray] = None,
+                evaluation_mask: Optional[np.ndarray] = None) -> AnalysisResult:
         """
         Analyzes channel data against thresholds.
-        
+
         Args:
             channel_data: Array of measurement values
             timestamps: Array of corresponding timestamps
             config: Channel configuration
-            
+            setpoint_data: Setpoint values aligned to timestamps, required
+                when config.setpoint_channel is set
+            evaluation_mask: Boolean array aligned to timestamps; samples
+                where it is False (e.g. outside the test phase) are skipped
+
         Returns:
             AnalysisResult containing analysis results
         """
         self.logger.info(f"Analyzing channel: {config.name}")
-        
+
         try:
             if config.setpoint_channel:
-                violations = self._check_dynamic_threshold(
-                    channel_data, timestamps, config)
+                if setpoint_data is None:
+                    raise ValueError(
+                        f"No data for setpoint channel {config.setpoint_channel}")
+                segments = self._check_dynamic_threshold(
+                    channel_data, timestamps, setpoint_data, config, evaluation_mask)
             else:
-                violations = self._check_static_threshold(
-                    channel_data, timestamps, config)
-            
-            max_deviation = self._calculate_max_deviation(violations)
-            
-            return AnalysisResult(
-                channel_name=config.name,
-                passed=len(violations) == 0,
-                violations=violations,
-                max_deviation=max_deviation
-            )
-            
+                segments = self._check_static_threshold(
+                    channel_data, timestamps, config, evaluation_mask)
+
+            result = AnalysisResult(config.name)
+            result.add_segments(segments)
+            result.max_deviation = self._calculate_max_deviation(segments)
+            result.passed = len(segments) == 0
+            if len(timestamps):
+                result.start_time = float(timestamps[0])
+                result.end_time = float(timestamps[-1])
+
+            if evaluation_mask is None:
+                evaluation_mask = np.ones(len(timestamps), dtype=bool)
+            result.evaluated_samples = int(np.count_nonzero(evaluation_mask))
+            starts, stops = self._run_bounds(evaluation_mask)
+            result.evaluated_duration = self._evaluated_duration(
+                timestamps[starts], timestamps[np.minimum(stops, len(timestamps) - 1)])
+
+            return result
+
         except Exception as e:
             self.logger.error(f"Analysis failed for {config.name}: {str(e)}")
             raise
 
-    def _check_static_threshold(self, data: np.ndarray, timestamps: np.ndarray, 
-                              config: ChannelConfig) -> List[Tuple[float, float, float]]:
+    def _check_static_threshold(self, data: np.ndarray, timestamps: np.ndarray,
+                              config: ChannelConfig,
+                              evaluation_mask: Optional[np.ndarray] = None) -> np.ndarray:
         """
         Checks data against static threshold.
-        
+
         Returns:
-            List of (timestamp, value, deviation) for violations
+            Structured array (SEGMENT_DTYPE) of violation segments
         """
-        violations = []
-        setpoint = float(config.static_setpoint)
-        tolerance = float(config.static_tolerance)
-        
-        upper_bound = setpoint + tolerance
-        lower_bound = setpoint - tolerance
-        
-        for t, v in zip(timestamps, data):
-            if v > upper_bound or v < lower_bound:
-                deviation = max(v - upper_bound, lower_bound - v)
-                violations.append((t, v, deviation))
-                
-        return violations
+        lower_bound, upper_bound = self._bounds(config)
+        return self._find_segments(
+            data, timestamps, lower_bound, upper_bound, evaluation_mask)
 
     def _check_dynamic_threshold(self, data: np.ndarray, timestamps: np.ndarray,
-                               setpoint_data: np.ndarray, config: ChannelConfig
-                               ) -> List[Tuple[float, float, float]]:
+                               setpoint_data: np.ndarray, config: ChannelConfig,
+                               evaluation_mask: Optional[np.ndarray] = None
+                               ) -> np.ndarray:
         """
         Checks data against dynamic threshold from setpoint channel.
-        
+
         Returns:
-            List of (timestamp, value, deviation) for violations
+            Structured array (SEGMENT_DTYPE) of violation segments
+        """
+        if len(setpoint_data) != len(data):
+            raise ValueError(
+                f"Setpoint length ({len(setpoint_data)}) doesn't match data "
+                f"length ({len(data)})")
+
+        lower_bound, upper_bound = self._bounds(config, setpoint_data)
+        return self._find_segments(
+            data, timestamps, lower_bound, upper_bound, evaluation_mask)
+
+    def _bounds(self, config: ChannelConfig, setpoint_data: Optional[np.ndarray] = None
+                ) -> Tuple[Union[float, np.ndarray], Union[float, np.ndarray]]:
+        """
+        Returns (lower_bound, upper_bound): arrays aligned with
+        setpoint_data if given, scalars around the static setpoint otherwise.
         """
-        violations = []
         tolerance = float(config.static_tolerance)
-        
-        for t, v, s in zip(timestamps, data, setpoint_data):
-            upper_bound = s + tolerance
-            lower_bound = s - tolerance
-            
-            if v > upper_bound or v < lower_bound:
-                deviation = max(v - upper_bound, lower_bound - v)
-                violations.append((t, v, deviation))
-                
-        return violations
-
-    def _calculate_max_deviation(self, violations: List[Tuple[float, float, float]]) -> float:
-        """Calculates maximum deviation from violations list."""
-        if not violations:
+        if setpoint_data is not None:
+            return setpoint_data - tolerance, setpoint_data + tolerance
+
+        setpoint = float(config.static_setpoint)
+        return setpoint - tolerance, setpoint + tolerance
+
+    def _violation_mask(self, data: np.ndarray,
+                        lower_bound: Union[float, np.ndarray],
+                        upper_bound: Union[float, np.ndarray],
+                        evaluation_mask: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Boolean mask of samples outside [lower_bound, upper_bound], limited
+        to samples where evaluation_mask is True.
+        """
+        mask = (data > upper_bound) | (data < lower_bound)
+        if evaluation_mask is not None:
+            mask &= evaluation_mask
+        return mask
+
+    def _find_segments(self, data: np.ndarray, timestamps: np.ndarray,
+                       lower_bound: Union[float, np.ndarray],
+                       upper_bound: Union[float, np.ndarray],
+                       evaluation_mask: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Groups all samples outside [lower_bound, upper_bound] into
+        contiguous segments.
+
+        Bounds may be scalars or arrays aligned with data. Samples where
+        evaluation_mask is False never violate and split segments.
+        Deviations are only computed for violating samples, and the peak
+        of each segment is its first sample with maximum deviation.
+
+        Returns:
+            Structured array (SEGMENT_DTYPE) of violation segments
+        """
+        mask = self._violation_mask(data, lower_bound, upper_bound, evaluation_mask)
+        return self._segments_from_mask(mask, data, timestamps, lower_bound, upper_bound)
+
+    def _segments_from_mask(self, mask: np.ndarray, data: np.ndarray,
+                            timestamps: np.ndarray,
+                            lower_bound: Union[float, np.ndarray],
+                            upper_bound: Union[float, np.ndarray]) -> np.ndarray:
+        """Reduces a violation mask to one segment record per run of True."""
+        starts, stops = self._run_bounds(mask)
+        counts = stops - starts
+
+        values = data[mask]
+        if np.ndim(upper_bound):
+            upper_bound = upper_bound[mask]
+            lower_bound = lower_bound[mask]
+        deviations = np.maximum(values - upper_bound, lower_bound - values)
+
+        segments = np.empty(len(counts), dtype=SEGMENT_DTYPE)
+        if not len(counts):
+            return segments
+
+        # Offsets of each segment within the compressed violation arrays
+        offsets = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        peak_deviations = np.maximum.reduceat(deviations, offsets)
+
+        # First sample in each segment that reaches the segment peak
+        is_peak = deviations == np.repeat(peak_deviations, counts)
+        peak_positions = np.flatnonzero(is_peak)
+        peak_segments = np.repeat(np.arange(len(counts)), counts)[peak_positions]
+        _, first = np.unique(peak_segments, return_index=True)
+        peak_index = starts + (peak_positions[first] - offsets)
+
+        segments['start_time'] = timestamps[starts]
+        segments['end_time'] = timestamps[stops - 1]
+        segments['sample_count'] = counts
+        segments['peak_deviation'] = peak_deviations
+        segments['peak_timestamp'] = timestamps[peak_index]
+        segments['peak_value'] = data[peak_index]
+        return segments
+
+    def _run_bounds(self, mask: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Returns (starts, stops) of all runs of True in mask, with stops
+        one past the last sample of each run.
+        """
+        # +1 where a run starts, -1 one past where it ends
+        edges = np.diff(mask.view(np.int8), prepend=0, append=0)
+        return np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+
+    def _evaluated_duration(self, run_start_times: np.ndarray,
+                            run_end_times: np.ndarray) -> float:
+        """
+        Total duration of the evaluated runs. Each run lasts until the
+        first sample after it, or its own last sample at the end of data.
+        math.fsum keeps the total independent of how runs are split up.
+        """
+        return math.fsum((run_end_times - run_start_times).tolist())
+
+    def _calculate_max_deviation(self, segments: np.ndarray) -> float:
+        """Calculates maximum deviation from segment peaks."""
+        peak_deviations = segments['peak_deviation']
+        if not len(peak_deviations):
             return 0.0
-        return max(v[2] for v in violations)
\ No newline at end of file
+        return float(peak_deviations.max())
@@ -0,0 +1,142 @@
+"""
+Compares the throughput of analyzing files one after another with the
+staged core.pipeline.Pipeline on synthetic measurements.
+
+--files measurements are generated (see benchmarks.synthetic) and each
+run analyzes all of them and writes their PDF reports (unless
+--no-report). The sequential run loads, analyzes and reports each file
+before starting the next; the pipelined run overlaps prefetching,
+analysis and reporting with the given per-stage concurrency. The
+fastest of --repeat runs counts, and the per-file results of both runs
+must agree.
+
+Usage: python -m benchmarks.bench_overlap [generator options] [--files N]
+    [--prefetch-workers N] [--analysis-workers N] [--plot-workers N]
+    [--queue-size N] [--repeat N] [--no-report] [--output FILE]
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+os.environ.setdefault('MPLBACKEND', 'Agg')
+
+# Imported lazily by the analysis and the report; loaded here so that
+# neither timed run pays for it
+import asammdf
+from visualization.report import ReportGenerator
+
+from config.config_handler import ConfigHandler
+from core.analyzer import MeasurementAnalyzer
+from core.pipeline import Pipeline
+from benchmarks import synthetic
+
+def run_sequential(config: Path, mf4_files: List[Path], report_dir: Path,
+                   report: bool, plot_workers: int) -> Dict[str, Any]:
+    analyzer = MeasurementAnalyzer(config)
+    report_generator = ReportGenerator(report_dir, workers=plot_workers) if report else None
+    outcome = {}
+    try:
+        for mf4_file in mf4_files:
+            results = analyzer.analyze_file(mf4_file, plot_data=report)
+            if report_generator is not None:
+                report_generator.generate_report(
+                    results, mf4_file, analyzer.channels, analyzer.config)
+            outcome[mf4_file.name] = {name: r.passed for name, r in results.items()}
+    finally:
+        if report_generator is not None:
+            report_generator.close()
+    return outcome
+
+def run_pipelined(config: Path, mf4_files: List[Path], report_dir: Path,
+                  report: bool, args: argparse.Namespace) -> Dict[str, Any]:
+    report_generator = (ReportGenerator(report_dir, workers=args.plot_workers)
+                        if report else None)
+    config_handler = ConfigHandler(config)
+    pipeline = Pipeline(
+        lambda: MeasurementAnalyzer(config, config_handler=config_handler),
+        report_generator=report_generator,
+        prefetch_workers=args.prefetch_workers,
+        analysis_workers=args.analysis_workers,
+        queue_size=args.queue_size
+    )
+    try:
+        file_results = pipeline.run(mf4_files)
+    finally:
+        if report_generator is not None:
+            report_generator.close()
+    for file_result in file_results:
+        if file_result.error is not None:
+            raise RuntimeError(f"{file_result.file_path}: {file_result.error}")
+    return {Path(r.file_path).name: {name: result.passed for name, result in r.results.items()}
+            for r in file_results}
+
+def run(args: argparse.Namespace, work_dir: Path) -> Dict[str, Any]:
+    mf4_files = []
+    config = None
+    for i in range(args.files):
+        mf4_path, config_path = synthetic.generate(
+            work_dir, channels=args.channels, rate=args.rate, duration=args.duration,
+            duplicates=args.duplicates, excursions=args.excursions,
+            setpoint=not args.no_setpoint, test_flag=not args.no_test_flag,
+            seed=args.seed + i, name=f"synthetic_{i}")
+        mf4_files.append(mf4_path)
+        config = config or config_path
+
+    timings = {'sequential': float('inf'), 'pipelined': float('inf')}
+    outcomes = {}
+    for _ in range(args.repeat):
+        for mode in timings:
+            # Reports are only skipped by the pipeline if they exist, so start empty
+            report_dir = Path(tempfile.mkdtemp(dir=work_dir, prefix=f'{mode}-'))
+            start = time.perf_counter()
+            if mode == 'sequential':
+                outcomes[mode] = run_sequential(config, mf4_files, report_dir,
+                                                not args.no_report, args.plot_workers)
+            else:
+                outcomes[mode] = run_pipelined(config, mf4_files, report_dir,
+                                               not args.no_report, args)
+            timings[mode] = min(timings[mode], time.perf_counter() - start)
+
+    if outcomes['sequential'] != outcomes['pipelined']:
+        raise RuntimeError("Sequential and pipelined results differ")
+
+    return {
+        'files': args.files,
+        'cpus': os.cpu_count(),
+        'stages': {'prefetch_workers': args.prefetch_workers,
+                   'analysis_workers': args.analysis_workers,
+                   'plot_workers': args.plot_workers,
+                   'queue_size': args.queue_size},
+        'seconds': timings,
+        'files_per_minute': {mode: args.files * 60 / seconds
+                             for mode, seconds in timings.items()},
+        'speedup': timings['sequential'] / timings['pipelined'],
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    synthetic.add_arguments(parser)
+    parser.add_argument('--files', type=int, default=6)
+    parser.add_argument('--prefetch-workers', type=int, default=1)
+    parser.add_argument('--analysis-workers', type=int, default=1)
+    parser.add_argument('--plot-workers', type=int, default=1)
+    parser.add_argument('--queue-size', type=int, default=2)
+    parser.add_argument('--repeat', type=int, default=1)
+    parser.add_argument('--no-report', action='store_true')
+    parser.add_argument('--output', type=Path, default=None, help="Write results as JSON")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        results = run(args, Path(work_dir))
+
+    for mode, seconds in results['seconds'].items():
+        print(f"{mode:10s} {seconds:8.2f} s  "
+              f"{results['files_per_minute'][mode]:8.1f} files/min")
+    print(f"speedup    {results['speedup']:8.2f}x")
+    if args.output is not None:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
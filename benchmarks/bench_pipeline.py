@@ -0,0 +1,270 @@
+"""
+Times and memory-profiles the analysis pipeline stage by stage on a
+synthetic measurement (see benchmarks.synthetic) or on given files.
+
+Stages: load_mf4 (FileHandler.load_mf4), filter_channels
+(FileHandler.filter_channels), process_channel (DataProcessor scaling,
+time window, setpoint interpolation and test flag mask), analyze
+(ThresholdAnalyzer.analyze) and generate_report
+(ReportGenerator.generate_report). Each stage is timed over --repeat runs;
+peak traced memory is measured in one extra run under tracemalloc, so it
+does not distort the timings.
+
+Results are written as JSON. With --baseline, each stage is compared to
+a previous result and the exit code is 1 if any stage got slower or
+bigger than --max-regression allows.
+
+Usage: python -m benchmarks.bench_pipeline [generator options]
+    [--mf4 FILE --config FILE] [--repeat N] [--no-report] [--no-memory]
+    [--output FILE] [--baseline FILE] [--max-regression FRACTION]
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+import asammdf
+import numpy as np
+
+from core.types import ChannelConfig
+from config.config_handler import ConfigHandler
+from data.channel import Channel
+from data.file_handler import FileHandler
+from analysis import DataProcessor, ThresholdAnalyzer
+from benchmarks import synthetic
+
+STAGES = ('load_mf4', 'filter_channels', 'process_channel', 'analyze', 'generate_report')
+
+def run_pipeline(mf4_path: Path, config_handler: ConfigHandler, report_dir: Optional[Path],
+                 stage: Callable[[str], Any]) -> Dict[str, int]:
+    """
+    Runs the pipeline once, wrapping each stage in stage(name).
+
+    Returns:
+        Channel count and total samples analyzed
+    """
+    config = config_handler.config
+    channel_configs: Dict[str, ChannelConfig] = config_handler.channel_configs
+    # A fresh handler, so the file is really loaded every run
+    file_handler = FileHandler()
+
+    with stage('load_mf4'):
+        mdf = file_handler.load_mf4(mf4_path)
+    try:
+        with stage('filter_channels'):
+            channels = file_handler.filter_channels(mdf, config)
+            # Channels decode lazily; count the decoding in this stage
+            for channel in channels.values():
+                channel.data, channel.timestamps
+        return _process_and_analyze(mf4_path, channels, channel_configs, report_dir, stage)
+    finally:
+        mdf.close()
+
+def _process_and_analyze(mf4_path: Path, channels: Dict[str, Channel],
+                         channel_configs: Dict[str, ChannelConfig],
+                         report_dir: Optional[Path], stage: Callable[[str], Any]
+                         ) -> Dict[str, int]:
+    processor = DataProcessor()
+    analyzer = ThresholdAnalyzer()
+
+    prepared = {}
+    with stage('process_channel'):
+        for name, channel_config in channel_configs.items():
+            channel = channels[name]
+            data, timestamps = processor.process_channel(
+                channel.data, channel.timestamps, channel_config)
+            setpoint = None
+            if channel_config.setpoint_channel:
+                source = channels[channel_config.setpoint_channel]
+                setpoint = processor.interpolate_channel(
+                    source.data, source.timestamps, timestamps)
+            mask = None
+            if channel_config.test_flag_channel:
+                flag = channels[channel_config.test_flag_channel]
+                mask = processor.evaluation_mask(
+                    flag.data, flag.timestamps, timestamps, channel_config.test_flag)
+            prepared[name] = Channel(name, data, timestamps,
+                                     metadata={'setpoint': setpoint, 'evaluation_mask': mask})
+
+    results = {}
+    with stage('analyze'):
+        for name, channel in prepared.items():
+            result = analyzer.analyze(
+                channel.data, channel.timestamps, channel_configs[name],
+                channel.metadata['setpoint'], channel.metadata['evaluation_mask'])
+            result.calculate_statistics()
+            results[name] = result
+
+    if report_dir is not None:
+        from visualization.report import ReportGenerator
+        with stage('generate_report'):
+            ReportGenerator(report_dir).generate_report(
+                results, mf4_path, prepared, channel_configs)
+
+    return {
+        'channels': len(prepared),
+        'samples': int(sum(len(channel.timestamps) for channel in prepared.values())),
+    }
+
+def measure(mf4_path: Path, config_path: Path, repeat: int, report_dir: Optional[Path],
+            memory: bool) -> Dict[str, Any]:
+    """Times every stage over repeat runs and optionally traces its peak memory."""
+    config_handler = ConfigHandler(config_path, use_sidecar=False)
+    timings: Dict[str, list] = {}
+
+    @contextmanager
+    def timed(name):
+        start = time.perf_counter()
+        yield
+        timings.setdefault(name, []).append(time.perf_counter() - start)
+
+    for _ in range(repeat):
+        counts = run_pipeline(mf4_path, config_handler, report_dir, timed)
+
+    peaks: Dict[str, int] = {}
+    if memory:
+        @contextmanager
+        def traced(name):
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            yield
+            peaks[name] = tracemalloc.get_traced_memory()[1] - before
+
+        tracemalloc.start()
+        try:
+            run_pipeline(mf4_path, config_handler, report_dir, traced)
+        finally:
+            tracemalloc.stop()
+
+    stages = {}
+    for name in STAGES:
+        if name not in timings:
+            continue
+        runs = timings[name]
+        stages[name] = {
+            'seconds': min(runs),
+            'median_seconds': statistics.median(runs),
+            'runs': runs,
+            'peak_bytes': peaks.get(name),
+        }
+    return {
+        **counts,
+        'file_bytes': os.path.getsize(mf4_path),
+        'stages': stages,
+        'total_seconds': sum(stage['seconds'] for stage in stages.values()),
+        'max_rss_bytes': max_rss_bytes(),
+    }
+
+def max_rss_bytes() -> Optional[int]:
+    """Peak resident set size of this process, or None where unknown (Windows)."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Bytes on macOS, KiB on Linux and the BSDs
+    return max_rss if sys.platform == 'darwin' else max_rss * 1024
+
+def compare(result: Dict[str, Any], baseline: Dict[str, Any], max_regression: float) -> bool:
+    """Prints each stage relative to the baseline; False if any regressed."""
+    ok = True
+    for name, stage in result['stages'].items():
+        base = baseline.get('stages', {}).get(name)
+        if base is None:
+            print(f"{name:16s} not in baseline")
+            continue
+        line = f"{name:16s} time {stage['seconds'] / base['seconds']:6.2f}x"
+        regressed = stage['seconds'] > base['seconds'] * (1 + max_regression)
+        if stage['peak_bytes'] is not None and base.get('peak_bytes'):
+            line += f"  memory {stage['peak_bytes'] / base['peak_bytes']:6.2f}x"
+            regressed |= stage['peak_bytes'] > base['peak_bytes'] * (1 + max_regression)
+        if regressed:
+            line += "  REGRESSION"
+            ok = False
+        print(line)
+    return ok
+
+def print_result(result: Dict[str, Any]) -> None:
+    print(f"Channels: {result['channels']}, samples: {result['samples']:,}, "
+          f"file: {result['file_bytes'] / 1024**2:.1f} MiB")
+    for name, stage in result['stages'].items():
+        line = f"{name:16s} {stage['seconds'] * 1000:10.1f} ms"
+        if stage['peak_bytes'] is not None:
+            line += f"  peak {stage['peak_bytes'] / 1024**2:9.1f} MiB"
+        print(line)
+    line = f"{'total':16s} {result['total_seconds'] * 1000:10.1f} ms"
+    if result['max_rss_bytes'] is not None:
+        line += f"  max RSS {result['max_rss_bytes'] / 1024**2:.1f} MiB"
+    print(line)
+
+def run(args: argparse.Namespace) -> int:
+    with tempfile.TemporaryDirectory(prefix='bench-') as work_dir:
+        work_dir = Path(work_dir)
+        if args.mf4 is not None:
+            mf4_path, config_path = args.mf4, args.config
+            parameters = {'mf4': str(args.mf4), 'config': str(args.config)}
+        else:
+            mf4_path, config_path = synthetic.generate_from_args(args, work_dir)
+            parameters = {key: getattr(args, key) for key in (
+                'channels', 'rate', 'duration', 'duplicates', 'excursions',
+                'no_setpoint', 'no_test_flag', 'seed')}
+
+        report_dir = None if args.no_report else work_dir / 'reports'
+        result = measure(mf4_path, config_path, args.repeat, report_dir, not args.no_memory)
+
+    result = {
+        'parameters': {**parameters, 'repeat': args.repeat},
+        'environment': {
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'asammdf': asammdf.__version__,
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+        },
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        **result,
+    }
+    print_result(result)
+
+    if args.output is not None:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(result, f, indent=2)
+        print(f"Wrote {args.output}")
+
+    if args.baseline is not None:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        print(f"Compared to {args.baseline}:")
+        if not compare(result, baseline, args.max_regression):
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    synthetic.add_arguments(parser)
+    parser.add_argument('--mf4', type=Path, default=None,
+                        help="Benchmark this file instead of a synthetic one")
+    parser.add_argument('--config', type=Path, default=None,
+                        help="Configuration workbook for --mf4")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--no-report', action='store_true',
+                        help="Skip the generate_report stage")
+    parser.add_argument('--no-memory', action='store_true',
+                        help="Skip the tracemalloc run")
+    parser.add_argument('--output', type=Path, default=None, help="Write results as JSON")
+    parser.add_argument('--baseline', type=Path, default=None,
+                        help="JSON result of a previous run to compare against")
+    parser.add_argument('--max-regression', type=float, default=0.2,
+                        help="Allowed slowdown or memory growth vs. the baseline")
+    args = parser.parse_args()
+    if (args.mf4 is None) != (args.config is None):
+        parser.error("--mf4 and --config must be given together")
+    sys.exit(run(args))
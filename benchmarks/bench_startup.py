@@ -0,0 +1,99 @@
+"""
+Measures the cold start of the command line interface and checks it
+against a time budget.
+
+Each case runs in a fresh interpreter, --repeat times; the fastest wall
+time counts. Also reports which heavy modules (asammdf, openpyxl,
+matplotlib, tkinter) each case loaded: the import-only cases must load
+none of them. With --mf4 and --config, a headless run of cli.py without
+PDF reports is measured as well, with tkinter blocked.
+
+Exits with 1 if a case exceeds --budget or loads a forbidden module.
+
+Usage: python -m benchmarks.bench_startup [--repeat N] [--budget SECONDS]
+    [--mf4 FILE --config FILE] [--output FILE]
+"""
+import argparse
+import json
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+ROOT = Path(__file__).resolve().parent.parent
+HEAVY_MODULES = ('asammdf', 'openpyxl', 'matplotlib', 'tkinter')
+
+# Runs the case, then reports the heavy modules it loaded on stderr
+_PROBE = """
+import json, sys
+sys.modules['tkinter'] = None  # a headless container without Tk
+try:
+    {code}
+except SystemExit:
+    pass
+sys.stderr.write('\\nLOADED ' + json.dumps(
+    [m for m in {heavy!r} if sys.modules.get(m) is not None]) + '\\n')
+"""
+
+def cases(mf4: Path = None, config: Path = None) -> List[Tuple[str, str, bool]]:
+    """(name, code, heavy modules allowed) of each measured case."""
+    run = [
+        ('python', 'pass', False),
+        ('import cli', 'import cli', False),
+        ('cli --help', "import cli; cli.main(['--help'])", False),
+        ('import core.analyzer', 'import core.analyzer', False),
+    ]
+    if mf4 is not None:
+        argv = ['--config', str(config), '--no-pdf', str(mf4)]
+        run.append(('cli headless run', f"import cli; cli.main({argv!r})", True))
+    return run
+
+def measure(code: str, repeat: int) -> Tuple[float, List[str]]:
+    best = float('inf')
+    loaded: List[str] = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        completed = subprocess.run(
+            [sys.executable, '-c', _PROBE.format(code=code, heavy=HEAVY_MODULES)],
+            cwd=ROOT, capture_output=True, text=True)
+        best = min(best, time.perf_counter() - start)
+        marker = completed.stderr.rfind('LOADED ')
+        if marker < 0:
+            raise RuntimeError(f"{code!r} failed:\n{completed.stderr}")
+        loaded = json.loads(completed.stderr[marker + len('LOADED '):])
+    return best, loaded
+
+def run(args: argparse.Namespace) -> int:
+    results: Dict[str, Any] = {'budget_seconds': args.budget, 'cases': {}}
+    ok = True
+    for name, code, heavy_allowed in cases(args.mf4, args.config):
+        seconds, loaded = measure(code, args.repeat)
+        status = []
+        if not heavy_allowed and seconds > args.budget:
+            status.append("OVER BUDGET")
+        forbidden = [m for m in loaded if not heavy_allowed or m == 'tkinter']
+        if forbidden:
+            status.append(f"LOADED {', '.join(forbidden)}")
+        ok &= not status
+        results['cases'][name] = {'seconds': seconds, 'loaded': loaded}
+        print(f"{name:22s} {seconds * 1000:8.1f} ms  loaded: {', '.join(loaded) or '-'}"
+              + (f"  {'; '.join(status)}" if status else ""))
+
+    if args.output is not None:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+    return 0 if ok else 1
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--budget', type=float, default=0.5,
+                        help="Maximum seconds for each import-only case")
+    parser.add_argument('--mf4', type=Path, default=None)
+    parser.add_argument('--config', type=Path, default=None)
+    parser.add_argument('--output', type=Path, default=None, help="Write results as JSON")
+    args = parser.parse_args()
+    if (args.mf4 is None) != (args.config is None):
+        parser.error("--mf4 and --config must be given together")
+    sys.exit(run(args))
@@ -0,0 +1,112 @@
+"""
+Benchmarks the vectorized threshold engine against the former
+sample-by-sample loop on large synthetic channels. Loop results are
+grouped into runs so both produce the same violation segments.
+
+Usage: python -m benchmarks.bench_threshold [--samples N] [--skip-loop]
+"""
+import argparse
+import time
+
+import numpy as np
+
+from core.types import ChannelConfig
+from analysis.threshold import ThresholdAnalyzer
+
+def loop_static(data, timestamps, setpoint, tolerance):
+    """Reference implementation: the original per-sample static check."""
+    violations = []
+    upper_bound = setpoint + tolerance
+    lower_bound = setpoint - tolerance
+    for t, v in zip(timestamps, data):
+        if v > upper_bound or v < lower_bound:
+            deviation = max(v - upper_bound, lower_bound - v)
+            violations.append((t, v, deviation))
+    return violations
+
+def loop_dynamic(data, timestamps, setpoint_data, tolerance):
+    """Reference implementation: the original per-sample dynamic check."""
+    violations = []
+    for t, v, s in zip(timestamps, data, setpoint_data):
+        upper_bound = s + tolerance
+        lower_bound = s - tolerance
+        if v > upper_bound or v < lower_bound:
+            deviation = max(v - upper_bound, lower_bound - v)
+            violations.append((t, v, deviation))
+    return violations
+
+def make_channel(n_samples: int, rate: float = 1000.0, seed: int = 0):
+    """Creates a noisy 1 kHz channel with injected excursions."""
+    rng = np.random.default_rng(seed)
+    timestamps = np.arange(n_samples) / rate
+    setpoint_data = 90 + 5 * np.sin(timestamps / 60)
+    data = setpoint_data + rng.normal(0, 1.0, n_samples)
+    for start in rng.integers(0, n_samples, 50):
+        data[start:start + 2000] += 10
+    return data, timestamps, setpoint_data
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+def segments_from_samples(reference, timestamps):
+    """Groups per-sample loop violations into runs of consecutive samples."""
+    segments = []
+    previous = None
+    for t, v, d in reference:
+        index = int(np.searchsorted(timestamps, t))
+        if previous is not None and index == previous + 1:
+            segment = segments[-1]
+            segment[1] = t
+            segment[2] += 1
+            if d > segment[3]:
+                segment[3:6] = [d, t, v]
+        else:
+            segments.append([t, t, 1, d, t, v])
+        previous = index
+    return segments
+
+def same_violations(vectorized, reference, timestamps) -> bool:
+    expected = segments_from_samples(reference, timestamps)
+    if len(vectorized) != len(expected):
+        return False
+    expected = np.array([tuple(s) for s in expected], dtype=vectorized.dtype)
+    return np.array_equal(vectorized, expected)
+
+def run(n_samples: int, skip_loop: bool) -> None:
+    analyzer = ThresholdAnalyzer()
+    data, timestamps, setpoint_data = make_channel(n_samples)
+
+    config = ChannelConfig('bench', static_setpoint=90.0, static_tolerance=8.0)
+
+    cases = [
+        ('static',
+         lambda: analyzer._check_static_threshold(data, timestamps, config),
+         lambda: loop_static(data, timestamps, 90.0, 8.0)),
+        ('dynamic',
+         lambda: analyzer._check_dynamic_threshold(
+             data, timestamps, setpoint_data, config),
+         lambda: loop_dynamic(data, timestamps, setpoint_data, 8.0)),
+    ]
+
+    print(f"Samples: {n_samples:,}")
+    for name, vectorized, loop in cases:
+        violations, t_vec = timed(vectorized)
+        line = (f"{name:8s} vectorized {t_vec * 1000:9.1f} ms  "
+                f"({int(violations['sample_count'].sum()):,} violations in "
+                f"{len(violations):,} segments)")
+        if not skip_loop:
+            reference, t_loop = timed(loop)
+            match = same_violations(violations, reference, timestamps)
+            line += (f"  loop {t_loop * 1000:10.1f} ms  "
+                     f"speedup {t_loop / t_vec:6.1f}x  identical={match}")
+        print(line)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--samples', type=int, default=10_000_000)
+    parser.add_argument('--skip-loop', action='store_true',
+                        help="Only time the vectorized engine")
+    args = parser.parse_args()
+    run(args.samples, args.skip_loop)
@@ -0,0 +1,155 @@
+"""
+Generates synthetic MF4 measurements with a matching config.xlsx, at any
+scale, for benchmarks.
+
+Every measured channel Signal_<i> is recorded once per source (ECU_SRC<k>),
+so channel names are duplicated and resolved through back2backID. Even
+channels are checked against the Setpoint channel, recorded at a quarter
+of the rate with offset timestamps so it has to be interpolated; odd
+channels against a static setpoint. Every second channel is only
+evaluated while the sparse TestFlag channel is 1. Each channel gets
+excursions of three times its tolerance.
+
+Usage: python -m benchmarks.synthetic OUTPUT_DIR [--channels N] [--rate HZ]
+    [--duration S] [--duplicates N] [--excursions N] [--no-setpoint]
+    [--no-test-flag] [--seed N]
+"""
+import argparse
+from pathlib import Path
+from typing import Tuple
+
+import numpy as np
+import openpyxl
+from asammdf import MDF, Signal
+from asammdf.blocks.source_utils import Source
+
+CONFIG_HEADERS = [
+    "Channel Name", "Sollwertkanal", "Toleranz statisch", "Skalierung",
+    "back2backID", "back2backIDPosition", "Sollwertkanalskalierung",
+    "Sollwert statisch", "Testflagchannel", "Testflag", "startTime", "endTime", "Unit",
+]
+
+STATIC_SETPOINT = 100.0
+TOLERANCE = 5.0
+NOISE = 1.0
+EXCURSION_SECONDS = 0.5
+
+def setpoint_curve(timestamps: np.ndarray) -> np.ndarray:
+    return 90.0 + 5.0 * np.sin(timestamps / 60.0)
+
+def is_dynamic(index: int, setpoint: bool) -> bool:
+    return setpoint and index % 2 == 0
+
+def is_gated(index: int, test_flag: bool) -> bool:
+    return test_flag and index % 2 == 1
+
+def generate(output_dir: Path, channels: int = 10, rate: float = 1000.0,
+             duration: float = 60.0, duplicates: int = 2, excursions: int = 5,
+             setpoint: bool = True, test_flag: bool = True, seed: int = 0,
+             name: str = 'synthetic') -> Tuple[Path, Path]:
+    """
+    Writes <name>.mf4 and <name>.xlsx to output_dir.
+
+    Args:
+        output_dir: Target directory, created if missing
+        channels: Number of distinct measured channels
+        rate: Sample rate of the measured channels in Hz
+        duration: Recording length in seconds
+        duplicates: Sources recording every measured channel; 1 writes
+            each channel once, without back2backID
+        excursions: Injected out-of-tolerance excursions per channel
+        setpoint: Add the Setpoint channel and check even channels against it
+        test_flag: Add the TestFlag channel and gate odd channels with it
+        seed: Seed of the random generator
+
+    Returns:
+        Tuple of (mf4_path, config_path)
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    timestamps = np.arange(int(rate * duration)) / rate
+    excursion_samples = max(1, int(EXCURSION_SECONDS * rate))
+
+    mdf = MDF()
+    for k in range(duplicates):
+        source = Source(name=f"ECU_SRC{k}", path=f"ECU_SRC{k}", comment="",
+                        source_type=Source.SOURCE_ECU, bus_type=Source.BUS_TYPE_NONE)
+        signals = []
+        for i in range(channels):
+            base = (setpoint_curve(timestamps) if is_dynamic(i, setpoint)
+                    else np.full(len(timestamps), STATIC_SETPOINT))
+            data = base + rng.normal(0.0, NOISE, len(timestamps))
+            for start in rng.integers(0, max(1, len(timestamps) - excursion_samples),
+                                      excursions):
+                data[start:start + excursion_samples] += 3 * TOLERANCE
+            signals.append(Signal(data, timestamps, name=f"Signal_{i}", unit='bar',
+                                  source=source if duplicates > 1 else None))
+        mdf.append(signals)
+
+    if setpoint:
+        setpoint_timestamps = np.arange(int(rate * duration / 4)) / (rate / 4) + 0.5 / rate
+        mdf.append([Signal(setpoint_curve(setpoint_timestamps), setpoint_timestamps,
+                           name='Setpoint', unit='bar')])
+
+    if test_flag:
+        # Toggles between test phases and pauses of a few seconds each
+        changes = np.sort(rng.uniform(0.0, duration, max(2, int(duration / 5))))
+        flags = (np.arange(len(changes)) % 2 == 0).astype(np.uint8)
+        mdf.append([Signal(flags, changes, name='TestFlag')])
+
+    mf4_path = output_dir / f"{name}.mf4"
+    mdf.save(mf4_path, overwrite=True)
+    mdf.close()
+
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.append(CONFIG_HEADERS)
+    for i in range(channels):
+        dynamic = is_dynamic(i, setpoint)
+        gated = is_gated(i, test_flag)
+        ws.append([
+            f"Signal_{i}",
+            'Setpoint' if dynamic else "",
+            str(TOLERANCE),
+            "1.0",
+            f"SRC{i % duplicates}" if duplicates > 1 else "",
+            "0",
+            "1.0" if dynamic else "",
+            "" if dynamic else str(STATIC_SETPOINT),
+            'TestFlag' if gated else "",
+            "1" if gated else "",
+            "",
+            "",
+            "bar",
+        ])
+    config_path = output_dir / f"{name}.xlsx"
+    wb.save(config_path)
+    return mf4_path, config_path
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    """Adds the generator parameters to parser."""
+    parser.add_argument('--channels', type=int, default=10)
+    parser.add_argument('--rate', type=float, default=1000.0, help="Sample rate in Hz")
+    parser.add_argument('--duration', type=float, default=60.0, help="Length in seconds")
+    parser.add_argument('--duplicates', type=int, default=2,
+                        help="Sources recording each channel")
+    parser.add_argument('--excursions', type=int, default=5,
+                        help="Excursions per channel")
+    parser.add_argument('--no-setpoint', action='store_true')
+    parser.add_argument('--no-test-flag', action='store_true')
+    parser.add_argument('--seed', type=int, default=0)
+
+def generate_from_args(args: argparse.Namespace, output_dir: Path) -> Tuple[Path, Path]:
+    return generate(output_dir, channels=args.channels, rate=args.rate,
+                    duration=args.duration, duplicates=args.duplicates,
+                    excursions=args.excursions, setpoint=not args.no_setpoint,
+                    test_flag=not args.no_test_flag, seed=args.seed)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('output_dir', type=Path)
+    add_arguments(parser)
+    args = parser.parse_args()
+    mf4_path, config_path = generate_from_args(args, args.output_dir)
+    print(f"Created {mf4_path} and {config_path}")
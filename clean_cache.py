@@ -0,0 +1,29 @@
+import argparse
+from pathlib import Path
+
+from data.disk_cache import ChannelDiskCache
+
+def clean_cache():
+    parser = argparse.ArgumentParser(description="Clean the on-disk channel cache")
+    parser.add_argument('directory', type=Path, help="Channel cache directory")
+    parser.add_argument('--max-mb', type=float, default=None,
+                        help="Shrink the cache to this size (least recently used first)")
+    parser.add_argument('--clear', action='store_true', help="Remove all entries")
+    args = parser.parse_args()
+
+    if not args.directory.is_dir():
+        print(f"No cache at {args.directory}")
+        return
+
+    cache = ChannelDiskCache(args.directory)
+    before = cache.size()
+    if args.clear:
+        cache.clear()
+    else:
+        max_bytes = int(args.max_mb * 1024**2) if args.max_mb is not None else None
+        cache.cleanup(max_bytes)
+
+    print(f"Cache size: {before / 1024**2:.1f} MB -> {cache.size() / 1024**2:.1f} MB")
+
+if __name__ == "__main__":
+    clean_cache()
@@ -0,0 +1,232 @@
+"""
+Headless command line interface of the measurement analysis system.
+
+Analyzes MF4 files, or all MF4 files in the given directories, against a
+configuration workbook and prints a pass/fail summary. Never touches Tk;
+asammdf, openpyxl and matplotlib are only imported once a file, a
+workbook or a report actually has to be processed.
+
+Exit status: 0 if every file passed, 1 if any channel failed or a file
+could not be analyzed, 2 on usage errors.
+
+Usage: python cli.py --config CONFIG [options] INPUT [INPUT ...]
+"""
+import argparse
+import logging
+import multiprocessing
+import os
+import sys
+from pathlib import Path
+from typing import List, Optional
+
+def build_parser(description: str = "Measurement analysis system") -> argparse.ArgumentParser:
+    """Parser with all analysis options; inputs are MF4 files or directories."""
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument('inputs', type=Path, nargs='*',
+                        help="MF4 files, or directories searched for *.mf4")
+    parser.add_argument('--config', type=Path, default=None,
+                        help="Configuration workbook")
+    parser.add_argument('--batch', action='store_true',
+                        help="Analyze all files in parallel on a process pool")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Worker processes in batch mode (default: CPU count)")
+    parser.add_argument('--chunk-records', type=int, default=None,
+                        help="Stream channels in chunks of this many records "
+                             "instead of loading them fully (batch mode)")
+    parser.add_argument('--report-dir', type=Path, default=Path("reports"),
+                        help="Directory for PDF reports")
+    parser.add_argument('--no-pdf', action='store_true',
+                        help="Do not generate PDF reports (matplotlib is not imported)")
+    parser.add_argument('--export-dir', type=Path, default=None,
+                        help="Write JSON/CSV/NPZ results to this directory")
+    parser.add_argument('--result-dir', type=Path, default=None,
+                        help="Store results here and reuse them for unchanged "
+                             "files and configuration rows")
+    parser.add_argument('--plot-workers', type=int, default=1,
+                        help="Processes rendering report pages (interactive mode; "
+                             "batch mode already runs one process per file)")
+    parser.add_argument('--prefetch-workers', type=int, default=1,
+                        help="Threads reading and decoding the next files while the "
+                             "current one is analyzed (interactive mode)")
+    parser.add_argument('--analysis-workers', type=int, default=1,
+                        help="Threads running the threshold analysis (interactive mode)")
+    parser.add_argument('--queue-size', type=int, default=2,
+                        help="Decoded files held between two stages (interactive mode)")
+    parser.add_argument('--catalog', type=Path, default=None,
+                        help="SQLite channel catalog; updated for the input directories "
+                             "and used to skip files missing configured channels (batch mode)")
+    parser.add_argument('--trace', type=Path, default=None,
+                        help="Write per-stage timing spans as a JSON trace (interactive mode)")
+    parser.add_argument('--metrics', type=Path, default=None,
+                        help="Write per-stage totals in Prometheus text format after "
+                             "each file (interactive mode)")
+    parser.add_argument('--trace-memory', action='store_true',
+                        help="Also record peak memory per stage with tracemalloc (slower; "
+                             "stages no longer overlap)")
+    parser.add_argument('-v', '--verbose', action='store_true',
+                        help="Log progress at INFO level")
+    return parser
+
+def check_options(parser: argparse.ArgumentParser, args: argparse.Namespace) -> None:
+    """Rejects option combinations that cannot work together."""
+    if args.chunk_records and not args.no_pdf:
+        parser.error("--chunk-records keeps no channel data to plot; add --no-pdf")
+
+def collect_inputs(inputs: List[Path]) -> List[Path]:
+    """Expands directories to their *.mf4 files, keeping the given order."""
+    mf4_files = []
+    for path in inputs:
+        if path.is_dir():
+            mf4_files.extend(sorted(path.glob("*.mf4")))
+        else:
+            mf4_files.append(path)
+    return mf4_files
+
+def _cache_dir() -> Optional[Path]:
+    cache_dir = os.environ.get('MEASUREMENT_CACHE_DIR')
+    return Path(cache_dir) if cache_dir else None
+
+def run_batch(args: argparse.Namespace, config_file: Path, mf4_files: List[Path],
+              catalog_dirs: List[Path]) -> int:
+    """Analyzes mf4_files on a process pool and prints a consolidated summary."""
+    from core.batch import BatchRunner
+
+    catalog = None
+    if args.catalog is not None:
+        from data.catalog import ChannelCatalog
+        catalog = ChannelCatalog(args.catalog)
+        for directory in catalog_dirs:
+            catalog.scan(directory, workers=args.workers, prune=False)
+
+    runner = BatchRunner(
+        config_file,
+        workers=args.workers,
+        cache_dir=_cache_dir(),
+        report_dir=None if args.no_pdf else args.report_dir,
+        chunk_records=args.chunk_records,
+        catalog=catalog,
+        export_dir=args.export_dir,
+        result_dir=args.result_dir
+    )
+    try:
+        results = runner.run(mf4_files)
+    finally:
+        if catalog is not None:
+            catalog.close()
+
+    if args.export_dir is not None:
+        from core.exporter import ResultExporter
+        ResultExporter(args.export_dir).export_batch(results)
+
+    print()
+    print(BatchRunner.summary(results))
+    return 0 if all(r.passed for r in results) else 1
+
+def run_files(args: argparse.Namespace, config_file: Path, mf4_files: List[Path]) -> int:
+    """
+    Analyzes mf4_files in this process, reading the next files and writing
+    the previous report while the current file is analyzed.
+    """
+    from config.config_handler import ConfigHandler
+    from core.analyzer import MeasurementAnalyzer
+    from core.instrumentation import Instrumentation
+    from core.pipeline import Pipeline
+    from core.result_store import ResultStore
+
+    # Loaded once, so an invalid workbook fails here and not for every file
+    config_handler = ConfigHandler(config_file)
+    result_store = ResultStore(args.result_dir) if args.result_dir is not None else None
+    instrumentation = Instrumentation(
+        enabled=args.trace is not None or args.metrics is not None,
+        trace_memory=args.trace_memory, max_traces=None)
+    if args.trace_memory:
+        logging.getLogger(__name__).warning(
+            "--trace-memory measures the whole process; stages run one after another")
+    cache_dir = _cache_dir()
+    report_generator = None
+    if not args.no_pdf:
+        # Reports are drawn on a pipeline thread, which interactive backends refuse
+        os.environ.setdefault('MPLBACKEND', 'Agg')
+        from visualization.report import ReportGenerator
+        report_generator = ReportGenerator(args.report_dir, workers=args.plot_workers,
+                                           instrumentation=instrumentation)
+    exporter = None
+    if args.export_dir is not None:
+        from core.exporter import ResultExporter
+        exporter = ResultExporter(args.export_dir)
+
+    pipeline = Pipeline(
+        lambda: MeasurementAnalyzer(config_file, cache_dir, result_store=result_store,
+                                    instrumentation=instrumentation,
+                                    config_handler=config_handler),
+        report_generator=report_generator,
+        exporter=exporter,
+        prefetch_workers=args.prefetch_workers,
+        analysis_workers=args.analysis_workers,
+        queue_size=args.queue_size,
+        instrumentation=instrumentation,
+        sequential=args.trace_memory
+    )
+
+    def print_summary(file_result) -> None:
+        name = Path(file_result.file_path).name
+        if file_result.error is None:
+            results = file_result.results
+            passed = sum(1 for r in results.values() if r.passed)
+            print(f"\nResults for {name}:")
+            print(f"Passed: {passed}/{len(results)} channels")
+            for channel_name, result in results.items():
+                if not result.passed:
+                    print(f"  {channel_name}: {len(result.segments)} excursions, "
+                          f"max deviation {result.max_deviation:.3g}")
+        if args.metrics is not None:
+            instrumentation.write_prometheus(args.metrics)
+
+    try:
+        results = pipeline.run(mf4_files, on_result=print_summary)
+    finally:
+        if report_generator is not None:
+            report_generator.close()
+        if args.trace is not None:
+            instrumentation.write_trace(args.trace)
+        instrumentation.close()
+
+    return 0 if all(r.passed for r in results) else 1
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = build_parser(__doc__.splitlines()[1])
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(
+        level=logging.INFO if args.verbose else logging.WARNING,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+    if args.config is None:
+        parser.error("--config is required")
+    if not args.config.is_file():
+        parser.error(f"configuration workbook not found: {args.config}")
+    if not args.inputs:
+        parser.error("no input files or directories given")
+    missing = [str(path) for path in args.inputs if not path.exists()]
+    if missing:
+        parser.error(f"inputs not found: {', '.join(missing)}")
+    check_options(parser, args)
+
+    mf4_files = collect_inputs(args.inputs)
+    if not mf4_files:
+        logging.getLogger(__name__).error("No MF4 files found")
+        return 1
+
+    try:
+        if args.batch:
+            return run_batch(args, args.config, mf4_files,
+                             [path for path in args.inputs if path.is_dir()])
+        return run_files(args, args.config, mf4_files)
+    except Exception as e:
+        logging.getLogger(__name__).error(f"Analysis system error: {str(e)}")
+        return 1
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    sys.exit(main())
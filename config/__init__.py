@@ -1,4 +1,5 @@
-from .config_handler import ConfigHandler
+from .config_handler import ConfigHandler, ConfigSnapshot
 from .validators import ConfigValidator
+from .watcher import ConfigWatcher
 
-__all__ = ['ConfigHandler', 'ConfigValidator']
\ No newline at end of file
+__all__ = ['ConfigHandler', 'ConfigSnapshot', 'ConfigValidator', 'ConfigWatcher']
\ No newline at end of file
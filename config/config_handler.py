@@ -1,55 +1,263 @@
+import hashlib
+import json
 import logging
+import os
+import tempfile
 from pathlib import Path
-import openpyxl
-from typing import Dict, Any
+from typing import Dict, Any, Optional, Set, Tuple
 
+from core.types import ChannelConfig
 from .validators import ConfigValidator
 
+# Format of the sidecar's content. Bump it whenever a change to reading,
+# validating or compiling the configuration alters what is cached, so
+# sidecars written by older code are not reused.
+SIDECAR_FORMAT = 3
+
+class ConfigSnapshot:
+    """
+    One consistent, loaded state of the configuration.
+
+    Snapshots are never modified once published: a reload or update
+    builds a new snapshot and swaps it in with a single assignment, so an
+    analysis that took a snapshot keeps seeing the same configuration.
+    """
+
+    __slots__ = ('config', 'channel_configs', 'skipped')
+
+    def __init__(self, config: Dict[str, Dict[str, Any]],
+                 channel_configs: Dict[str, ChannelConfig],
+                 skipped: Tuple[str, ...] = ()):
+        # Raw validated rows and their compiled ChannelConfigs
+        self.config = config
+        self.channel_configs = channel_configs
+        # Channels whose rows failed validation
+        self.skipped = tuple(skipped)
+
+    def changed_channels(self, other: 'ConfigSnapshot') -> Set[str]:
+        """Names of channels added, removed or changed between two snapshots."""
+        names = set(self.config) | set(other.config)
+        return {name for name in names
+                if self.config.get(name) != other.config.get(name)
+                or self.channel_configs.get(name) != other.channel_configs.get(name)}
+
 class ConfigHandler:
     """
     Handles loading and managing configuration from Excel files.
+
+    The workbook is read once in read-only mode, validated, and compiled
+    into immutable ChannelConfig objects (channel_configs). Raw rows stay
+    available as config. The validated rows are cached as JSON in a
+    sidecar next to the workbook (.<name>.cache), which is reused while
+    the workbook's mtime and size, or failing that its content hash, and
+    the sidecar format (SIDECAR_FORMAT) are unchanged. The sidecar
+    holds plain data only, as the workbook usually sits in a shared
+    folder; ChannelConfigs are compiled from its rows on load.
+
+    The current state is held in one ConfigSnapshot; reload() replaces
+    it atomically, so callers that need a consistent view over several
+    lookups should take snapshot once.
     """
-    def __init__(self, config_file: Path):
+    def __init__(self, config_file: Path, use_sidecar: bool = True):
         self.logger = logging.getLogger(__name__)
         self.config_file = config_file
         self.validator = ConfigValidator()
-        self.config = {}
+        self.use_sidecar = use_sidecar
+        self.snapshot = ConfigSnapshot({}, {})
         self.load_config()
 
+    @property
+    def config(self) -> Dict[str, Dict[str, Any]]:
+        return self.snapshot.config
+
+    @property
+    def channel_configs(self) -> Dict[str, ChannelConfig]:
+        return self.snapshot.channel_configs
+
+    @property
+    def sidecar_path(self) -> Path:
+        path = Path(self.config_file)
+        return path.with_name(f".{path.name}.cache")
+
+    def workbook_signature(self) -> Tuple[int, int]:
+        """(mtime_ns, size) of the workbook."""
+        stat = os.stat(self.config_file)
+        return stat.st_mtime_ns, stat.st_size
+
     def load_config(self):
         """
         Loads configuration from Excel file.
         Validates all channel configurations.
         """
         try:
-            self.logger.info(f"Loading configuration from {self.config_file}")
-            wb = openpyxl.load_workbook(self.config_file)
-            ws = wb.active
+            self.snapshot = self._read_snapshot()
+        except Exception as e:
+            self.logger.error(f"Failed to load configuration: {str(e)}")
+            raise
+
+    def reload(self) -> Set[str]:
+        """
+        Reloads the workbook and swaps in the new configuration.
+        
+        Rows that were already invalid are skipped, as on the initial
+        load. If the edit made a row invalid that was valid before, the
+        current configuration is kept and ValueError is raised.
+        
+        Returns:
+            Names of channels added, removed or changed by the reload
+        """
+        snapshot = self._read_snapshot()
+        invalidated = [name for name in snapshot.skipped if name not in self.snapshot.skipped]
+        if invalidated:
+            raise ValueError(
+                f"Invalid configuration for channels: {', '.join(invalidated)}")
+        
+        changed = snapshot.changed_channels(self.snapshot)
+        self.snapshot = snapshot
+        if changed:
+            self.logger.info(f"Reloaded configuration, changed channels: "
+                             f"{', '.join(sorted(changed))}")
+        return changed
+
+    def _read_snapshot(self) -> ConfigSnapshot:
+        """Reads, validates and compiles the workbook, or loads its sidecar."""
+        if self.use_sidecar:
+            # Taken before reading, so a concurrent edit invalidates the sidecar
+            signature = self.workbook_signature()
+            snapshot = self._load_sidecar(signature)
+            if snapshot is not None:
+                return snapshot
+            workbook_hash = self._workbook_hash()
+        
+        # Not needed while the sidecar is current
+        import openpyxl
+        self.logger.info(f"Loading configuration from {self.config_file}")
+        wb = openpyxl.load_workbook(self.config_file, read_only=True, data_only=True)
+        try:
+            rows = wb.active.iter_rows(values_only=True)
             
             # Get headers from first row
-            headers = [cell.value for cell in ws[1][1:]]
+            headers = list(next(rows, ())[1:])
             
+            config = {}
+            skipped = []
             # Process each channel row
-            for row in ws.iter_rows(min_row=2):
-                if not row[0].value:  # Skip empty rows
+            for row in rows:
+                if not row or not row[0]:  # Skip empty rows
                     continue
-                    
-                channel_name = row[0].value
+                
+                channel_name = row[0]
+                values = row[1:]
                 # Create dictionary of parameters for this channel
                 config_data = {
-                    headers[i]: row[i+1].value if row[i+1].value is not None else ""
-                    for i in range(len(headers))
+                    header: values[i] if i < len(values) and values[i] is not None else ""
+                    for i, header in enumerate(headers)
                 }
                 
                 # Validate and store configuration
                 if self.validator.validate_channel_config(channel_name, config_data):
-                    self.config[channel_name] = config_data
+                    config[channel_name] = config_data
                 else:
                     self.logger.warning(f"Skipping invalid configuration for channel {channel_name}")
-                    
+                    skipped.append(channel_name)
+        finally:
+            wb.close()
+        
+        snapshot = ConfigSnapshot(config, {
+            name: self.compile_channel_config(name, config_data)
+            for name, config_data in config.items()
+        }, skipped)
+        
+        if self.use_sidecar:
+            self._write_sidecar({
+                'version': SIDECAR_FORMAT,
+                'signature': list(signature),
+                'hash': workbook_hash,
+                'config': snapshot.config,
+                'skipped': list(snapshot.skipped),
+            })
+        return snapshot
+
+    @staticmethod
+    def compile_channel_config(channel_name: str, config_data: Dict[str, Any]) -> ChannelConfig:
+        """Builds the typed ChannelConfig of a validated configuration row."""
+        fields = {}
+        fields['setpoint_channel'] = config_data.get('Sollwertkanal', '')
+        # Handle empty strings for numeric values
+        if config_data.get('Sollwert statisch'):
+            fields['static_setpoint'] = float(config_data['Sollwert statisch'])
+        fields['static_tolerance'] = float(config_data.get('Toleranz statisch')) if config_data.get('Toleranz statisch') else 0.0
+        fields['scaling'] = float(config_data.get('Skalierung')) if config_data.get('Skalierung') else 1.0
+        
+        fields['unit'] = config_data.get('Unit') or ''
+        
+        fields['back2back_id'] = config_data.get('back2backID', '')
+        fields['back2back_id_position'] = int(config_data.get('back2backIDPosition')) if config_data.get('back2backIDPosition') else 0
+        
+        if config_data.get('Testflagchannel'):
+            fields['test_flag_channel'] = config_data['Testflagchannel']
+            fields['test_flag'] = int(config_data.get('Testflag', 0))
+        
+        if config_data.get('startTime'):
+            fields['start_time'] = float(config_data['startTime'])
+        if config_data.get('endTime'):
+            fields['end_time'] = float(config_data['endTime'])
+        
+        return ChannelConfig(channel_name, **fields)
+
+    def _workbook_hash(self) -> str:
+        with open(self.config_file, 'rb') as f:
+            return hashlib.blake2b(f.read(), digest_size=20).hexdigest()
+
+    def _load_sidecar(self, signature: Tuple[int, int]) -> Optional[ConfigSnapshot]:
+        """Returns the sidecar's configuration if it matches the workbook."""
+        try:
+            with open(self.sidecar_path, encoding='utf-8') as f:
+                cached = json.load(f)
+            if not isinstance(cached, dict) or cached.get('version') != SIDECAR_FORMAT:
+                return None
+            if tuple(cached['signature']) != signature:
+                # e.g. touched or copied without changes
+                if cached['hash'] != self._workbook_hash():
+                    return None
+                self._write_sidecar({**cached, 'signature': list(signature)})
+            
+            config = cached['config']
+            snapshot = ConfigSnapshot(config, {
+                name: self.compile_channel_config(name, config_data)
+                for name, config_data in config.items()
+            }, cached['skipped'])
+        except FileNotFoundError:
+            return None
         except Exception as e:
-            self.logger.error(f"Failed to load configuration: {str(e)}")
-            raise
+            self.logger.warning(f"Ignoring unreadable config cache {self.sidecar_path}: {str(e)}")
+            return None
+        
+        self.logger.info(f"Loading configuration from {self.sidecar_path}")
+        return snapshot
+
+    def _write_sidecar(self, cached: Dict[str, Any]) -> None:
+        """Writes the validated rows next to the workbook, best effort."""
+        try:
+            text = json.dumps(cached)
+            round_trips = json.loads(text) == cached
+        except (TypeError, ValueError):
+            round_trips = False
+        if not round_trips:
+            # e.g. date cells or numeric channel names, which would not load back unchanged
+            self.logger.info(f"Not caching configuration with non-JSON values: {self.config_file}")
+            return
+        try:
+            fd, tmp = tempfile.mkstemp(dir=self.sidecar_path.parent, prefix='.tmp-')
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    f.write(text)
+                os.replace(tmp, self.sidecar_path)
+            except Exception:
+                os.unlink(tmp)
+                raise
+        except OSError as e:
+            self.logger.warning(f"Could not write config cache {self.sidecar_path}: {str(e)}")
 
     def get_channel_config(self, channel_name: str) -> Dict[str, Any]:
         """
@@ -78,7 +286,12 @@ class ConfigHandler:
         """
         try:
             if self.validator.validate_channel_config(channel_name, new_config):
-                self.config[channel_name] = new_config
+                snapshot = self.snapshot
+                self.snapshot = ConfigSnapshot(
+                    {**snapshot.config, channel_name: new_config},
+                    {**snapshot.channel_configs,
+                     channel_name: self.compile_channel_config(channel_name, new_config)},
+                    [name for name in snapshot.skipped if name != channel_name])
                 return True
             return False
         except Exception as e:
@@ -108,7 +108,7 @@ class ConfigValidator:
     def _validate_test_flags(self, channel_name: str, config: Dict[str, Any]) -> bool:
         """Validates test flag configuration if present."""
         if config.get("Testflagchannel"):
-            if not config.get("Testflag"):
+            if config.get("Testflag") in (None, ""):
                 self.logger.error(f"Test flag channel specified but no flag value for {channel_name}")
                 return False
             try:
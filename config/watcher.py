@@ -0,0 +1,109 @@
+import logging
+import threading
+from typing import Callable, List, Optional, Set, Tuple
+
+from .config_handler import ConfigHandler
+
+class ConfigWatcher:
+    """
+    Polls a ConfigHandler's workbook and reloads it when it changes.
+
+    A change is only picked up once the workbook's mtime and size have
+    been stable for one polling interval, so a workbook that is still
+    being saved is not read half-written. Reloads that fail to read or
+    validate keep the current configuration and are retried on the
+    following polls, so a workbook that was locked or fixed later is
+    still picked up. After a successful reload every listener is called
+    with the names of the added, removed or changed channels.
+    """
+    def __init__(self, config_handler: ConfigHandler, interval: float = 2.0):
+        self.logger = logging.getLogger(__name__)
+        self.config_handler = config_handler
+        self.interval = interval
+        self._listeners: List[Callable[[Set[str]], None]] = []
+        # Signature of the configuration in use and of a pending change
+        self._signature = self._current_signature()
+        self._pending: Optional[Tuple[int, int]] = None
+        # Signature whose reload failed, logged only once
+        self._failed: Optional[Tuple[int, int]] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def add_listener(self, listener: Callable[[Set[str]], None]) -> None:
+        """Registers listener(changed_channels), called from the watcher thread."""
+        self._listeners.append(listener)
+
+    def start(self) -> None:
+        """Starts polling in a daemon thread."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name='config-watcher', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stops polling and waits for the thread to finish."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self) -> 'ConfigWatcher':
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def check(self) -> Optional[Set[str]]:
+        """
+        Polls the workbook once.
+
+        Returns:
+            Changed channel names if the configuration was reloaded,
+            otherwise None
+        """
+        signature = self._current_signature()
+        if signature is None or signature == self._signature:
+            self._pending = None
+            return None
+        if signature != self._pending:
+            # Changed since the last poll, wait until it settles
+            self._pending = signature
+            return None
+
+        self._pending = None
+        try:
+            changed = self.config_handler.reload()
+        except Exception as e:
+            message = (f"Keeping current configuration, reload of "
+                       f"{self.config_handler.config_file} failed: {str(e)}")
+            if signature != self._failed:
+                self.logger.error(message)
+            else:
+                self.logger.debug(message)
+            self._failed = signature
+            return None
+
+        self._signature = signature
+        self._failed = None
+
+        if changed:
+            for listener in self._listeners:
+                try:
+                    listener(changed)
+                except Exception as e:
+                    self.logger.error(f"Config change listener failed: {str(e)}")
+        return changed
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.check()
+
+    def _current_signature(self) -> Optional[Tuple[int, int]]:
+        try:
+            return self.config_handler.workbook_signature()
+        except OSError:
+            # e.g. replaced by an editor's atomic save
+            return None
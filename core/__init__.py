@@ -1,4 +1,27 @@
-from .analyzer import MeasurementAnalyzer
-from .types import ChannelConfig, AnalysisResult
+import importlib
 
-__all__ = ['MeasurementAnalyzer', 'ChannelConfig', 'AnalysisResult']
\ No newline at end of file
+# Public names and their submodules, imported on first access (PEP 562),
+# so that importing one submodule does not load the whole pipeline.
+# PyInstaller cannot follow these imports, so code within the application
+# imports from the submodules directly.
+_EXPORTS = {
+    'MeasurementAnalyzer': '.analyzer',
+    'BatchRunner': '.batch',
+    'Pipeline': '.pipeline',
+    'ChannelConfig': '.types',
+    'AnalysisResult': '.types',
+    'FileResult': '.types',
+    'SEGMENT_DTYPE': '.types',
+}
+
+__all__ = ['MeasurementAnalyzer', 'BatchRunner', 'Pipeline', 'ChannelConfig', 'AnalysisResult', 'FileResult', 'SEGMENT_DTYPE']
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
\ No newline at end of file
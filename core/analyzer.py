@@ -1,39 +1,113 @@
 import logging
+import threading
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, Set
 import numpy as np
 
-from config.config_handler import ConfigHandler
-from data import FileHandler
-from analysis import ThresholdAnalyzer, DataProcessor
+from config.config_handler import ConfigHandler, ConfigSnapshot
+from config.watcher import ConfigWatcher
+from data.channel import Channel
+from data.disk_cache import ChannelDiskCache
+from data.file_handler import FileHandler
+from analysis import ThresholdAnalyzer, DataProcessor, StreamingThresholdAnalyzer, ChunkAligner
+from .instrumentation import Instrumentation
+from .result_store import ResultStore
 from .types import ChannelConfig, AnalysisResult
 
 class MeasurementAnalyzer:
     """
     Main class coordinating the measurement analysis process.
     Handles configuration, data loading, and analysis coordination.
+    
+    With a ResultStore, results of channels whose file, configuration row
+    and analysis code are unchanged are reused instead of recomputed.
+    
+    With an enabled Instrumentation, every file is traced as a 'file' span
+    with 'extract' and per-channel 'channel' spans, which nest 'decode',
+    'process', 'align', 'threshold' and 'store' (or 'stream' when
+    streaming).
+    
+    Each analysis takes a snapshot of the configuration when it starts and
+    uses it throughout, so a configuration reloaded meanwhile (see
+    watch_config) only applies from the next file on.
     """
     
-    def __init__(self, config_file: Path):
+    def __init__(self, config_file: Path, cache_dir: Optional[Path] = None,
+                 in_place: bool = False, result_store: Optional[ResultStore] = None,
+                 instrumentation: Optional[Instrumentation] = None,
+                 config_handler: Optional[ConfigHandler] = None):
         self.logger = logging.getLogger(__name__)
         
-        # Initialize components
-        self.config_handler = ConfigHandler(config_file)
-        self.file_handler = FileHandler()
+        # Scale extracted channel data in place instead of copying it
+        self.in_place = in_place
+        
+        # Initialize components; analyzers of one run may share a loaded handler
+        self.config_handler = config_handler or ConfigHandler(config_file)
+        disk_cache = ChannelDiskCache(cache_dir) if cache_dir else None
+        self.file_handler = FileHandler(disk_cache=disk_cache)
         self.data_processor = DataProcessor()
         self.threshold_analyzer = ThresholdAnalyzer()
+        self.streaming_analyzer = StreamingThresholdAnalyzer(self.threshold_analyzer)
+        self.result_store = result_store
+        # Timing spans per file, channel and stage; disabled unless given
+        self.instrumentation = instrumentation or Instrumentation(enabled=False)
+        
+        # Configuration snapshot of the current analysis
+        self.snapshot: ConfigSnapshot = self.config_handler.snapshot
+        # Channels whose cached data is dropped before the next analysis
+        self._invalidated: Set[str] = set()
+        self._invalidated_lock = threading.Lock()
         
         # Store configurations and results
         self.config: Dict[str, ChannelConfig] = {}
         self.results: Dict[str, AnalysisResult] = {}
-        self.channels: Dict[str, Dict[str, np.ndarray]] = {}
+        self.channels: Dict[str, Channel] = {}
+        # Channels of the current file whose results came from the store
+        self.reused: Set[str] = set()
+
+    def watch_config(self, interval: float = 2.0) -> ConfigWatcher:
+        """
+        Starts reloading the configuration in the background whenever the
+        workbook changes; cached data of changed channels is invalidated
+        before the next analysis. Stop the returned watcher when done.
+        """
+        watcher = ConfigWatcher(self.config_handler, interval)
+        watcher.add_listener(self.invalidate_channels)
+        watcher.start()
+        return watcher
 
-    def analyze_file(self, mf4_file: Path) -> Dict[str, AnalysisResult]:
+    def invalidate_channels(self, channel_names: Set[str]) -> None:
+        """
+        Marks the cached data of channel_names as outdated. It is dropped
+        when the next analysis starts, never during one. Stored results
+        need no invalidation, as they are keyed by the configuration row.
+        """
+        with self._invalidated_lock:
+            self._invalidated.update(channel_names)
+
+    def stale_channels(self, mf4_file: Path) -> List[str]:
+        """Configured channels without a reusable stored result for mf4_file."""
+        config = self.config_handler.snapshot.config
+        if self.result_store is None:
+            return list(config)
+        fingerprint = self.result_store.fingerprint(mf4_file)
+        return [name for name, channel_config in config.items()
+                if not self.result_store.contains(fingerprint, name, channel_config)]
+
+    def analyze_file(self, mf4_file: Path, plot_data: bool = False,
+                     channels: Optional[Dict[str, Channel]] = None) -> Dict[str, AnalysisResult]:
         """
         Analyzes a single MF4 file for all configured channels.
         
         Args:
             mf4_file: Path to the MF4 file to analyze
+            plot_data: Also load the data of channels whose results are
+                reused, so that self.channels is complete for reporting.
+                Otherwise only recomputed channels are loaded, and the file
+                is not opened at all if every result is reused.
+            channels: Channels already extracted from mf4_file, e.g. by
+                a prefetching stage; any other required channel is
+                extracted here
             
         Returns:
             Dictionary of analysis results for each channel
@@ -41,22 +115,130 @@ class MeasurementAnalyzer:
         try:
             self.logger.info(f"Starting analysis of {mf4_file}")
             
-            # Load and filter channels
-            mf4_data = self.file_handler.load_mf4(mf4_file)
-            channels = self.file_handler.filter_channels(
-                mf4_data, 
-                self.config_handler.config
-            )
+            with self.instrumentation.span('file', file=str(mf4_file),
+                                           streaming=False) as file_span:
+                # Results and channels only ever describe the current file
+                self.results = {}
+                self.channels = {}
+                self._begin_analysis()
+                
+                stored = self._stored_results(mf4_file)
+                self.reused = set(stored)
+                config = self.snapshot.config
+                file_span.set(channels=len(config), reused=len(stored))
+                required = config if plot_data else {
+                    name: channel_config for name, channel_config in config.items()
+                    if name not in stored}
+                
+                # Load and filter channels
+                channels = dict(channels or {})
+                required = {name: channel_config for name, channel_config in required.items()
+                            if name not in channels}
+                if required:
+                    with self.instrumentation.span('extract', channels=len(required)):
+                        channels.update(self.file_handler.extract_channels(mf4_file, required))
+                
+                # Channels read by other channels (setpoints, test flags) must
+                # not be modified in place
+                referenced = self._referenced_channels()
+                
+                # Process each channel
+                for channel_name, config in self.snapshot.config.items():
+                    try:
+                        in_place = self.in_place and channel_name not in referenced
+                        with self.instrumentation.span('channel', channel=channel_name,
+                                                       reused=channel_name in stored):
+                            if channel_name in stored:
+                                self.results[channel_name] = stored[channel_name]
+                                self.config[channel_name] = self.snapshot.channel_configs[channel_name]
+                                if plot_data:
+                                    self._prepare_channel(channel_name, channels, config, in_place)
+                                continue
+                            
+                            result = self._analyze_channel(
+                                channel_name, channels, config, in_place=in_place)
+                            self.results[channel_name] = result
+                            self._store_result(mf4_file, channel_name, config, result)
+                    
+                    except Exception as e:
+                        self.logger.error(f"Failed to analyze channel {channel_name}: {str(e)}")
+                        continue
             
-            # Process each channel
-            for channel_name, config in self.config_handler.config.items():
-                try:
-                    result = self._analyze_channel(channel_name, channels, config)
-                    self.results[channel_name] = result
+            return self.results
+            
+        except Exception as e:
+            self.logger.error(f"Analysis failed: {str(e)}")
+            raise
+
+    def analyze_file_streaming(self, mf4_file: Path,
+                               chunk_records: int = 1_000_000) -> Dict[str, AnalysisResult]:
+        """
+        Analyzes a single MF4 file chunk by chunk, for recordings larger
+        than memory. Peak memory is bounded by chunk_records; results match
+        analyze_file exactly. Processed channel data is not kept, so
+        self.channels stays empty.
+        
+        Args:
+            mf4_file: Path to the MF4 file to analyze
+            chunk_records: Maximum number of records decoded at once per channel
+            
+        Returns:
+            Dictionary of analysis results for each channel
+        """
+        try:
+            self.logger.info(f"Starting streaming analysis of {mf4_file}")
+            
+            with self.instrumentation.span('file', file=str(mf4_file),
+                                           streaming=True) as file_span:
+                self.results = {}
+                self.channels = {}
+                self._begin_analysis()
+                mdf = None
+                
+                stored = self._stored_results(mf4_file)
+                self.reused = set(stored)
+                file_span.set(channels=len(self.snapshot.config), reused=len(stored))
+                
+                for channel_name, config in self.snapshot.config.items():
+                    try:
+                        with self.instrumentation.span('channel', channel=channel_name,
+                                                       reused=channel_name in stored) as channel_span:
+                            channel_config = self.snapshot.channel_configs[channel_name]
+                            if channel_name in stored:
+                                self.results[channel_name] = stored[channel_name]
+                                self.config[channel_name] = channel_config
+                                continue
+                            
+                            if mdf is None:
+                                with self.instrumentation.span('load'):
+                                    mdf = self.file_handler.load_mf4(mf4_file)
+                            chunks = self._processed_chunks(
+                                self.file_handler.iter_channel_chunks(
+                                    mdf, channel_name, config, chunk_records),
+                                channel_config, channel_span)
+                            
+                            setpoint = None
+                            if channel_config.setpoint_channel:
+                                setpoint = ChunkAligner(self.file_handler.iter_channel_chunks(
+                                    mdf, channel_config.setpoint_channel, config, chunk_records))
+                            
+                            test_flag = None
+                            if channel_config.test_flag_channel:
+                                test_flag = ChunkAligner(self.file_handler.iter_channel_chunks(
+                                    mdf, channel_config.test_flag_channel, config, chunk_records))
+                            
+                            # Decoding, processing and checks interleave chunk by chunk
+                            with self.instrumentation.span('stream'):
+                                result = self.streaming_analyzer.analyze(
+                                    chunks, channel_config, setpoint, test_flag)
+                                result.calculate_statistics()
+                            self.results[channel_name] = result
+                            self.config[channel_name] = channel_config
+                            self._store_result(mf4_file, channel_name, config, result)
                     
-                except Exception as e:
-                    self.logger.error(f"Failed to analyze channel {channel_name}: {str(e)}")
-                    continue
+                    except Exception as e:
+                        self.logger.error(f"Failed to analyze channel {channel_name}: {str(e)}")
+                        continue
             
             return self.results
             
@@ -64,8 +246,70 @@ class MeasurementAnalyzer:
             self.logger.error(f"Analysis failed: {str(e)}")
             raise
 
+    def _processed_chunks(self, chunks, channel_config: ChannelConfig, span):
+        """
+        Applies scaling and the time window chunk by chunk. Each chunk is
+        freshly decoded, so it is scaled in place. Decoded samples and
+        bytes are counted on span.
+        """
+        samples = nbytes = 0
+        for data, timestamps in chunks:
+            samples += len(timestamps)
+            nbytes += data.nbytes + timestamps.nbytes
+            span.set(samples=samples, bytes=nbytes)
+            if (channel_config.end_time is not None and len(timestamps)
+                    and timestamps[0] > channel_config.end_time):
+                break
+            yield self.data_processor.process_channel(
+                data, timestamps, channel_config, in_place=True)
+
+    def _begin_analysis(self) -> None:
+        """Applies pending cache invalidations and takes the configuration snapshot."""
+        with self._invalidated_lock:
+            invalidated, self._invalidated = self._invalidated, set()
+        if invalidated and self.file_handler.disk_cache is not None:
+            self.file_handler.disk_cache.invalidate_channels(invalidated)
+        self.snapshot = self.config_handler.snapshot
+
+    def _stored_results(self, mf4_file: Path) -> Dict[str, AnalysisResult]:
+        """Reusable stored results of the configured channels for mf4_file."""
+        if self.result_store is None:
+            return {}
+        with self.instrumentation.span('stored_results'):
+            fingerprint = self.result_store.fingerprint(mf4_file)
+            stored = {}
+            for channel_name, config in self.snapshot.config.items():
+                result = self.result_store.load(fingerprint, channel_name, config)
+                if result is not None:
+                    stored[channel_name] = result
+        if stored:
+            self.logger.info(
+                f"Reusing {len(stored)} of {len(self.snapshot.config)} "
+                f"stored results for {mf4_file}")
+        return stored
+
+    def _store_result(self, mf4_file: Path, channel_name: str, config: Dict[str, Any],
+                      result: AnalysisResult) -> None:
+        if self.result_store is None:
+            return
+        try:
+            with self.instrumentation.span('store'):
+                self.result_store.store(
+                    self.result_store.fingerprint(mf4_file), channel_name, config, result)
+        except Exception as e:
+            self.logger.warning(f"Failed to store result of {channel_name}: {str(e)}")
+
+    def _referenced_channels(self) -> Set[str]:
+        """Names of channels used as setpoint or test flag channels."""
+        referenced = set()
+        for config in self.snapshot.config.values():
+            for key in ('Sollwertkanal', 'Testflagchannel'):
+                if config.get(key):
+                    referenced.add(config[key])
+        return referenced
+
     def _analyze_channel(self, channel_name: str, channels: Dict[str, np.ndarray], 
-                        config: Dict[str, Any]) -> AnalysisResult:
+                        config: Dict[str, Any], in_place: bool = False) -> AnalysisResult:
         """
         Analyzes a single channel.
         
@@ -73,55 +317,78 @@ class MeasurementAnalyzer:
             channel_name: Name of the channel
             channels: Dictionary of channel data
             config: Channel configuration
+            in_place: Scale the extracted channel data in place
             
         Returns:
             Analysis results for the channel
         """
-        # Create configuration object
-        channel_config = self._create_channel_config(channel_name, config)
-        
-        # Get and process channel data
-        channel = channels[channel_name]
-        data, timestamps = self.data_processor.process_channel(
-            channel.data,        # Object property access
-            channel.timestamps,  # Object property access
-            channel_config
-        )
-        
-        # Store processed channel data
-        self.channels[channel_name] = {
-            'data': data,
-            'timestamps': timestamps
-        }
+        channel_config, data, timestamps, setpoint_data, evaluation_mask = \
+            self._prepare_channel(channel_name, channels, config, in_place)
         
         # Analyze against thresholds
-        result = self.threshold_analyzer.analyze(
-            data, timestamps, channel_config
-        )
-        
-        # Calculate additional statistics
-        result.calculate_statistics()
+        with self.instrumentation.span('threshold') as span:
+            result = self.threshold_analyzer.analyze(
+                data, timestamps, channel_config, setpoint_data, evaluation_mask
+            )
+            
+            # Calculate additional statistics
+            result.calculate_statistics()
+            span.set(samples=len(timestamps), segments=len(result.segments),
+                     bytes=data.nbytes + timestamps.nbytes
+                     + (setpoint_data.nbytes if setpoint_data is not None else 0))
         
         return result
 
-    def _create_channel_config(self, channel_name: str, config_data: Dict[str, Any]) -> ChannelConfig:
-        config = ChannelConfig(channel_name)
+    def _prepare_channel(self, channel_name: str, channels: Dict[str, Channel],
+                         config: Dict[str, Any], in_place: bool = False) -> tuple:
+        """
+        Processes a channel and aligns its setpoint and test flag channels,
+        keeping the result in self.channels and self.config for reporting.
         
-        config.setpoint_channel = config_data.get('Sollwertkanal', '')
-        # Handle empty strings for numeric values
-        config.static_tolerance = float(config_data.get('Toleranz statisch')) if config_data.get('Toleranz statisch') else 0.0
-        config.scaling = float(config_data.get('Skalierung')) if config_data.get('Skalierung') else 1.0
+        Returns:
+            Tuple of (channel_config, data, timestamps, setpoint_data,
+            evaluation_mask)
+        """
+        # Compiled once when the configuration was loaded
+        channel_config = self.snapshot.channel_configs[channel_name]
+        
+        # Channels decode lazily, on first access
+        with self.instrumentation.span('decode') as span:
+            channel = channels[channel_name]
+            raw_data, raw_timestamps = channel.data, channel.timestamps
+            span.set(samples=len(raw_timestamps),
+                     bytes=raw_data.nbytes + raw_timestamps.nbytes)
         
-        config.back2back_id = config_data.get('back2backID', '')
-        config.back2back_id_position = int(config_data.get('back2backIDPosition')) if config_data.get('back2backIDPosition') else 0
+        # Get and process channel data
+        with self.instrumentation.span('process') as span:
+            data, timestamps = self.data_processor.process_channel(
+                raw_data,
+                raw_timestamps,
+                channel_config,
+                in_place=in_place
+            )
+            span.set(samples=len(timestamps), bytes=data.nbytes + timestamps.nbytes)
         
-        if config_data.get('Testflagchannel'):
-            config.test_flag_channel = config_data['Testflagchannel']
-            config.test_flag = int(config_data.get('Testflag', 0))
+        with self.instrumentation.span('align'):
+            # Align setpoint channel to the processed timestamps
+            setpoint_data = None
+            if channel_config.setpoint_channel:
+                setpoint = channels[channel_config.setpoint_channel]
+                setpoint_data = self.data_processor.interpolate_channel(
+                    setpoint.data, setpoint.timestamps, timestamps)
+            
+            # Only evaluate samples where the held test flag has the configured value
+            evaluation_mask = None
+            if channel_config.test_flag_channel:
+                test_flag = channels[channel_config.test_flag_channel]
+                evaluation_mask = self.data_processor.evaluation_mask(
+                    test_flag.data, test_flag.timestamps, timestamps, channel_config.test_flag)
         
-        if config_data.get('startTime'):
-            config.start_time = float(config_data['startTime'])
-        if config_data.get('endTime'):
-            config.end_time = float(config_data['endTime'])
+        # Store processed channel data and its configuration for reporting
+        self.channels[channel_name] = Channel(
+            channel_name, data, timestamps,
+            metadata={'setpoint': setpoint_data, 'evaluation_mask': evaluation_mask}
+        )
+        self.config[channel_name] = channel_config
         
-        return config
\ No newline at end of file
+        return channel_config, data, timestamps, setpoint_data, evaluation_mask
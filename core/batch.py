@@ -0,0 +1,202 @@
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Callable, List, Optional, Set
+
+from .types import FileResult
+
+# Per-process state, built once by _init_worker and reused for every file
+_analyzer = None
+_report_generator = None
+_exporter = None
+_chunk_records = None
+
+def _init_worker(config_file: Path, cache_dir: Optional[Path],
+                 report_dir: Optional[Path], chunk_records: Optional[int] = None,
+                 export_dir: Optional[Path] = None,
+                 result_dir: Optional[Path] = None,
+                 config_interval: Optional[float] = None) -> None:
+    global _analyzer, _report_generator, _exporter, _chunk_records
+    from .analyzer import MeasurementAnalyzer
+    from .result_store import ResultStore
+
+    _chunk_records = chunk_records
+    if export_dir is not None:
+        from .exporter import ResultExporter
+        _exporter = ResultExporter(export_dir)
+
+    result_store = ResultStore(result_dir) if result_dir is not None else None
+    _analyzer = MeasurementAnalyzer(config_file, cache_dir, result_store=result_store)
+    if config_interval:
+        # Long-running workers pick up configuration changes
+        _analyzer.watch_config(config_interval)
+    if report_dir is not None:
+        os.environ.setdefault('MPLBACKEND', 'Agg')
+        from visualization.report import ReportGenerator
+        _report_generator = ReportGenerator(report_dir)
+
+def _process_file(mf4_file: Path) -> FileResult:
+    """Analyzes one file with the worker's analyzer; never raises."""
+    start = time.perf_counter()
+    try:
+        # Reports are only redrawn if a result changed or the PDF is missing
+        report = _report_generator is not None and (
+            not _report_generator.report_path(mf4_file).exists()
+            or bool(_analyzer.stale_channels(mf4_file)))
+        if _chunk_records:
+            results = _analyzer.analyze_file_streaming(mf4_file, _chunk_records)
+        else:
+            results = _analyzer.analyze_file(mf4_file, plot_data=report)
+        if _exporter is not None:
+            _exporter.export(results, mf4_file,
+                             duration=time.perf_counter() - start)
+        if report:
+            _report_generator.generate_report(
+                results, mf4_file, _analyzer.channels, _analyzer.config)
+        return FileResult(str(mf4_file), results,
+                          duration=time.perf_counter() - start)
+    except Exception as e:
+        logging.getLogger(__name__).error(
+            f"Failed to process {mf4_file}: {str(e)}", exc_info=True)
+        return FileResult(str(mf4_file), error=f"{type(e).__name__}: {e}",
+                          duration=time.perf_counter() - start)
+    finally:
+        # Each file is analyzed once; keeping it open would hold its memory
+        # and, on Windows, stop the daemon from moving it out of the inbox
+        _analyzer.file_handler.cache.invalidate(mf4_file)
+
+class BatchRunner:
+    """
+    Analyzes many MF4 files in parallel on a process pool.
+
+    Each worker builds its MeasurementAnalyzer (and ReportGenerator) once
+    and reuses it for all files it is given. A failing file is recorded
+    as a FileResult with an error and does not stop the others. With
+    chunk_records set, files are analyzed in streaming mode, which keeps
+    no channel data to plot, so it cannot be combined with report_dir.
+    With a ChannelCatalog, files it knows to lack required channels are skipped
+    without being opened. With export_dir set, per-file JSON/CSV/NPZ
+    results are written there. With result_dir set, results of unchanged
+    file/channel pairs are reused from a ResultStore there.
+    """
+    def __init__(self, config_file: Path, workers: Optional[int] = None,
+                 cache_dir: Optional[Path] = None,
+                 report_dir: Optional[Path] = None,
+                 chunk_records: Optional[int] = None,
+                 catalog=None,
+                 export_dir: Optional[Path] = None,
+                 result_dir: Optional[Path] = None):
+        self.logger = logging.getLogger(__name__)
+        if chunk_records and report_dir is not None:
+            raise ValueError("Streaming analysis (chunk_records) keeps no channel data "
+                             "for PDF reports")
+        self.config_file = config_file
+        self.workers = workers or os.cpu_count() or 1
+        self.cache_dir = cache_dir
+        self.report_dir = report_dir
+        self.chunk_records = chunk_records
+        self.catalog = catalog
+        self.export_dir = export_dir
+        self.result_dir = result_dir
+
+    def run(self, mf4_files: List[Path],
+            on_result: Optional[Callable[[FileResult], None]] = None) -> List[FileResult]:
+        """
+        Processes all files and returns their results in completion order.
+
+        Args:
+            mf4_files: Files to analyze
+            on_result: Called with each FileResult as soon as its file finishes
+        """
+        initargs = (self.config_file, self.cache_dir, self.report_dir,
+                    self.chunk_records, self.export_dir, self.result_dir)
+        results = []
+
+        if self.catalog is not None:
+            mf4_files = self._skip_incomplete(mf4_files, results, on_result)
+            if not mf4_files:
+                return results
+
+        # A single worker runs in-process, which avoids pool start-up costs
+        if self.workers == 1 or len(mf4_files) == 1:
+            _init_worker(*initargs)
+            for mf4_file in mf4_files:
+                results.append(self._collect(_process_file(mf4_file), on_result))
+            return results
+
+        workers = min(self.workers, len(mf4_files))
+        self.logger.info(f"Processing {len(mf4_files)} files with {workers} workers")
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=initargs) as pool:
+            futures = {pool.submit(_process_file, f): f for f in mf4_files}
+            for future in as_completed(futures):
+                try:
+                    file_result = future.result()
+                except Exception as e:
+                    # Worker process died, e.g. killed for running out of memory
+                    file_result = FileResult(str(futures[future]),
+                                             error=f"{type(e).__name__}: {e}")
+                results.append(self._collect(file_result, on_result))
+
+        return results
+
+    def _skip_incomplete(self, mf4_files: List[Path], results: List[FileResult],
+                         on_result: Optional[Callable[[FileResult], None]]) -> List[Path]:
+        """
+        Records files the catalog knows to lack required channels as
+        errors and returns the remaining files. Files without a current
+        catalog entry are kept.
+        """
+        required = self._required_channels()
+        remaining = []
+        for mf4_file in mf4_files:
+            missing = self.catalog.missing_channels(mf4_file, required)
+            if missing:
+                file_result = FileResult(
+                    str(mf4_file), error=f"Missing channels: {', '.join(sorted(missing))}")
+                results.append(self._collect(file_result, on_result))
+            else:
+                remaining.append(mf4_file)
+        return remaining
+
+    def _required_channels(self) -> Set[str]:
+        """Configured channels and their setpoint and test flag channels."""
+        from config.config_handler import ConfigHandler
+
+        required = set()
+        for channel_name, config in ConfigHandler(self.config_file).config.items():
+            required.add(channel_name)
+            for key in ('Sollwertkanal', 'Testflagchannel'):
+                if config.get(key):
+                    required.add(config[key])
+        return required
+
+    def _collect(self, file_result: FileResult,
+                 on_result: Optional[Callable[[FileResult], None]]) -> FileResult:
+        status = 'ERROR' if file_result.error else ('PASS' if file_result.passed else 'FAIL')
+        self.logger.info(f"{status} {file_result.file_path} ({file_result.duration:.1f} s)")
+        if on_result is not None:
+            on_result(file_result)
+        return file_result
+
+    @staticmethod
+    def summary(results: List[FileResult]) -> str:
+        """Consolidated pass/fail summary over all files."""
+        lines = []
+        for file_result in sorted(results, key=lambda r: r.file_path):
+            name = Path(file_result.file_path).name
+            if file_result.error:
+                lines.append(f"ERROR {name}: {file_result.error}")
+                continue
+            passed = sum(1 for r in file_result.results.values() if r.passed)
+            status = 'PASS ' if file_result.passed else 'FAIL '
+            lines.append(f"{status} {name}: {passed}/{len(file_result.results)} channels passed")
+
+        errors = sum(1 for r in results if r.error)
+        passed = sum(1 for r in results if r.passed)
+        lines.append("")
+        lines.append(f"Files: {len(results)}, passed: {passed}, "
+                     f"failed: {len(results) - passed - errors}, errors: {errors}")
+        return '\n'.join(lines)
@@ -0,0 +1,310 @@
+import asyncio
+import json
+import logging
+import os
+import shutil
+import signal
+import tempfile
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Optional, Set, Tuple
+
+from .batch import _init_worker, _process_file
+from .types import FileResult
+
+# Seconds of uptime before files_per_hour is reported; shorter windows
+# extrapolate a few files to meaningless rates
+MIN_RATE_WINDOW = 600.0
+
+class InboxDaemon:
+    """
+    Watches an inbox directory and analyzes MF4 files dropped into it.
+
+    The inbox is polled every poll_interval seconds. A file is queued
+    once its size and mtime have not changed for stable_seconds, so
+    recordings still being copied are left alone. The queue holds at
+    most queue_size files; while it is full, polling pauses, which keeps
+    a backlog in the inbox instead of in memory. Files are analyzed on a
+    pool of worker processes, each with its own MeasurementAnalyzer (see
+    core.batch), which reloads the configuration when it changes.
+
+    Analyzed files, whether they passed or not, are moved to
+    processed_dir, and reports and exports are written to their
+    directories. A file whose analysis raised an error is retried up to
+    retries times with exponential backoff and then moved to failed_dir.
+    A JSON status file with queue depth, files in progress, counters and
+    throughput is rewritten after every poll and every finished file.
+    """
+    def __init__(self, config_file: Path, inbox: Path, processed_dir: Path,
+                 failed_dir: Path, report_dir: Optional[Path] = None,
+                 export_dir: Optional[Path] = None, result_dir: Optional[Path] = None,
+                 cache_dir: Optional[Path] = None, workers: Optional[int] = None,
+                 queue_size: Optional[int] = None, poll_interval: float = 2.0,
+                 stable_seconds: float = 5.0, retries: int = 2, retry_delay: float = 30.0,
+                 status_file: Optional[Path] = None, config_interval: Optional[float] = 10.0,
+                 pattern: str = '*.mf4'):
+        self.logger = logging.getLogger(__name__)
+        self.config_file = config_file
+        self.inbox = Path(inbox)
+        self.processed_dir = Path(processed_dir)
+        self.failed_dir = Path(failed_dir)
+        self.workers = workers or os.cpu_count() or 1
+        self.queue_size = queue_size or 2 * self.workers
+        self.poll_interval = poll_interval
+        self.stable_seconds = stable_seconds
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self.status_file = status_file
+        self.pattern = pattern
+        self._initargs = (config_file, cache_dir, report_dir, None,
+                          export_dir, result_dir, config_interval)
+
+        # Path -> (size, mtime_ns, first seen with this signature)
+        self._candidates: Dict[Path, Tuple[int, int, float]] = {}
+        # Queued, in progress or waiting for a retry
+        self._pending: Dict[Path, int] = {}
+        self._in_progress: Dict[Path, float] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._stop: Optional[asyncio.Event] = None
+        self._started = time.time()
+        self._finished: "deque[float]" = deque()
+        # Scheduled retries and the tasks they started, cancelled on shutdown
+        self._retry_timers: Set[asyncio.TimerHandle] = set()
+        self._retry_tasks: Set[asyncio.Task] = set()
+        self.counters = {'processed': 0, 'passed': 0, 'failed': 0, 'errors': 0, 'retries': 0}
+
+    def run(self) -> None:
+        """Runs until SIGINT or SIGTERM, then finishes the files in progress."""
+        asyncio.run(self.serve())
+
+    def stop(self) -> None:
+        """Stops polling; files in progress are finished, queued ones stay in the inbox."""
+        if self._stop is not None:
+            self._stop.set()
+
+    async def serve(self) -> None:
+        for directory in (self.inbox, self.processed_dir, self.failed_dir):
+            directory.mkdir(parents=True, exist_ok=True)
+
+        loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._stop = asyncio.Event()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, self.stop)
+            except (NotImplementedError, RuntimeError):
+                # e.g. Windows, or not in the main thread
+                pass
+
+        self._started = time.time()
+        self._pool = self._new_pool()
+        self.logger.info(f"Watching {self.inbox} with {self.workers} workers")
+        workers = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        try:
+            await self._poll()
+        finally:
+            # Let running analyses finish; queued files and retries stay in the inbox
+            while not self._queue.empty():
+                self._pending.pop(self._queue.get_nowait(), None)
+                self._queue.task_done()
+            for _ in workers:
+                await self._queue.put(None)
+            await asyncio.gather(*workers, return_exceptions=True)
+            for timer in self._retry_timers:
+                timer.cancel()
+            for task in self._retry_tasks:
+                task.cancel()
+            await asyncio.gather(*self._retry_tasks, return_exceptions=True)
+            self._pool.shutdown(wait=True)
+            self._write_status()
+            self.logger.info("Stopped watching")
+
+    async def _poll(self) -> None:
+        while not self._stop.is_set():
+            for path in self._stable_files():
+                self._pending[path] = 0
+                # Blocks while the queue is full (backpressure)
+                await self._enqueue(path)
+                if self._stop.is_set():
+                    return
+            self._write_status()
+            try:
+                await asyncio.wait_for(self._stop.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _enqueue(self, path: Path) -> None:
+        put = asyncio.create_task(self._queue.put(path))
+        stop = asyncio.create_task(self._stop.wait())
+        await asyncio.wait({put, stop}, return_when=asyncio.FIRST_COMPLETED)
+        if not put.done():
+            put.cancel()
+            self._pending.pop(path, None)
+        stop.cancel()
+
+    def _stable_files(self):
+        """Inbox files whose size and mtime did not change for stable_seconds."""
+        now = time.monotonic()
+        seen = set()
+        for path in sorted(self.inbox.glob(self.pattern)):
+            if path in self._pending:
+                continue
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            seen.add(path)
+            signature = (stat.st_size, stat.st_mtime_ns)
+            candidate = self._candidates.get(path)
+            if candidate is None or candidate[:2] != signature:
+                self._candidates[path] = (*signature, now)
+            elif now - candidate[2] >= self.stable_seconds:
+                del self._candidates[path]
+                yield path
+        for path in set(self._candidates) - seen:
+            del self._candidates[path]
+
+    async def _worker(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            path = await self._queue.get()
+            if path is None:
+                self._queue.task_done()
+                return
+            self._in_progress[path] = time.time()
+            try:
+                pool = self._pool
+                try:
+                    file_result = await loop.run_in_executor(pool, _process_file, path)
+                except BrokenProcessPool as e:
+                    # A worker died, e.g. out of memory; start a fresh pool
+                    if self._pool is pool:
+                        pool.shutdown(wait=False)
+                        self._pool = self._new_pool()
+                    file_result = FileResult(str(path), error=f"{type(e).__name__}: {e}")
+                self._finish(path, file_result)
+            finally:
+                self._in_progress.pop(path, None)
+                self._queue.task_done()
+                self._write_status()
+
+    def _finish(self, path: Path, file_result: FileResult) -> None:
+        if file_result.error is None:
+            self.counters['processed'] += 1
+            self.counters['passed' if file_result.passed else 'failed'] += 1
+            self._record_finished()
+            self.logger.info(f"{'PASS' if file_result.passed else 'FAIL'} {path.name} "
+                             f"({file_result.duration:.1f} s)")
+            self._move(path, self.processed_dir)
+            return
+
+        attempt = self._pending.get(path, 0)
+        if attempt < self.retries and path.exists():
+            delay = self.retry_delay * 2 ** attempt
+            self._pending[path] = attempt + 1
+            self.counters['retries'] += 1
+            self.logger.warning(f"Retrying {path.name} in {delay:.0f} s "
+                                f"({attempt + 1}/{self.retries}): {file_result.error}")
+            self._schedule_retry(path, delay)
+            return
+
+        self.counters['errors'] += 1
+        self._record_finished()
+        self.logger.error(f"Giving up on {path.name}: {file_result.error}")
+        if path.exists():
+            self._move(path, self.failed_dir)
+        # Forget the file even if it vanished or could not be moved, so a
+        # file arriving later under the same name is picked up
+        self._pending.pop(path, None)
+
+    def _schedule_retry(self, path: Path, delay: float) -> None:
+        loop = asyncio.get_running_loop()
+
+        def start() -> None:
+            self._retry_timers.discard(timer)
+            task = loop.create_task(self._retry(path))
+            self._retry_tasks.add(task)
+            task.add_done_callback(self._retry_tasks.discard)
+
+        timer = loop.call_later(delay, start)
+        self._retry_timers.add(timer)
+
+    async def _retry(self, path: Path) -> None:
+        if self._stop.is_set():
+            self._pending.pop(path, None)
+            return
+        await self._enqueue(path)
+
+    def _move(self, path: Path, directory: Path) -> None:
+        target = directory / path.name
+        if target.exists():
+            target = directory / f"{path.stem}_{datetime.now():%Y%m%d_%H%M%S}{path.suffix}"
+        try:
+            shutil.move(str(path), str(target))
+        except OSError as e:
+            self.logger.error(f"Failed to move {path} to {directory}: {str(e)}")
+            # A move that fell back to copying can leave a partial copy behind
+            if path.exists() and target.exists():
+                try:
+                    target.unlink()
+                except OSError:
+                    pass
+        # Only forget the file once it left the inbox, so it is not queued again
+        if not path.exists():
+            self._pending.pop(path, None)
+
+    def _record_finished(self) -> None:
+        now = time.time()
+        self._finished.append(now)
+        while self._finished and self._finished[0] < now - 3600:
+            self._finished.popleft()
+
+    def status(self) -> Dict[str, Any]:
+        """Current queue depth, files in progress, counters and throughput."""
+        now = time.time()
+        uptime = now - self._started
+        recent = sum(1 for t in self._finished if t >= now - 3600)
+        files_per_hour = None
+        if uptime >= MIN_RATE_WINDOW:
+            files_per_hour = round(recent * 3600 / min(uptime, 3600), 1)
+        return {
+            'inbox': str(self.inbox),
+            'updated': datetime.fromtimestamp(now).isoformat(timespec='seconds'),
+            'uptime_seconds': round(uptime, 1),
+            'workers': self.workers,
+            'queue_depth': self._queue.qsize() if self._queue is not None else 0,
+            'queue_capacity': self.queue_size,
+            'waiting': len(self._candidates),
+            'in_progress': {path.name: round(now - started, 1)
+                            for path, started in self._in_progress.items()},
+            **self.counters,
+            'files_last_hour': recent,
+            # Over the last hour, or the uptime if shorter; None while too short
+            'files_per_hour': files_per_hour,
+        }
+
+    def _write_status(self) -> None:
+        if self.status_file is None:
+            return
+        path = Path(self.status_file)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=path.parent, prefix='.tmp-')
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    json.dump(self.status(), f, indent=2)
+                os.replace(tmp, path)
+            except Exception:
+                os.unlink(tmp)
+                raise
+        except OSError as e:
+            self.logger.warning(f"Could not write status file {path}: {str(e)}")
+
+    def _new_pool(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                   initargs=self._initargs)
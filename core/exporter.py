@@ -0,0 +1,157 @@
+import csv
+import json
+import logging
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+import numpy as np
+
+from .types import AnalysisResult, FileResult
+
+# Per-channel summary columns of the CSV exports
+CHANNEL_FIELDS = [
+    'channel', 'passed', 'max_deviation', 'violation_segments', 'total_violations',
+    'violation_duration', 'evaluated_samples', 'evaluated_duration',
+    'start_time', 'end_time',
+]
+
+class ResultExporter:
+    """
+    Writes analysis results in machine-readable form, without matplotlib.
+
+    Per file, <stem>_results.json holds the file verdict and per-channel
+    results, statistics and violation segments, <stem>_results.csv one
+    summary row per channel with its segment count and duration, and
+    <stem>_segments.npz the violation segments of every channel as
+    SEGMENT_DTYPE arrays. Channel names can be anything a workbook holds,
+    so the arrays are stored as segments_<i> and the 'channels' array
+    maps i to the channel name.
+    """
+    FORMATS = ('json', 'csv', 'npz')
+
+    def __init__(self, output_dir: Path, formats=FORMATS):
+        self.logger = logging.getLogger(__name__)
+        self.output_dir = Path(output_dir)
+        unknown = set(formats) - set(self.FORMATS)
+        if unknown:
+            raise ValueError(f"Unknown export formats: {', '.join(sorted(unknown))}")
+        self.formats = tuple(formats)
+
+    def export(self, results: Dict[str, AnalysisResult], mf4_file: Path,
+               error: Optional[str] = None, duration: float = 0.0) -> None:
+        """
+        Writes the results of one file in all configured formats.
+
+        Args:
+            results: Analysis results by channel name
+            mf4_file: The analyzed file, which names the exports
+            error: Error that stopped the analysis, if any
+            duration: Seconds spent processing the file so far
+        """
+        mf4_file = Path(mf4_file)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+
+        try:
+            if 'json' in self.formats:
+                file_result = FileResult(str(mf4_file), results, error, duration)
+                self._write_json(self.output_dir / f"{mf4_file.stem}_results.json",
+                                 self._file_summary(file_result))
+            if 'csv' in self.formats:
+                self._write_csv(self.output_dir / f"{mf4_file.stem}_results.csv",
+                                CHANNEL_FIELDS,
+                                [self._channel_row(r) for r in results.values()])
+            if 'npz' in self.formats:
+                self._write_npz(self.output_dir / f"{mf4_file.stem}_segments.npz", results)
+        except Exception as e:
+            self.logger.error(f"Failed to export results of {mf4_file}: {str(e)}")
+            raise
+
+    def export_batch(self, file_results: List[FileResult], name: str = 'batch') -> None:
+        """
+        Writes <name>_results.json with every file and <name>_results.csv
+        with one row per file and channel.
+        """
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        file_results = sorted(file_results, key=lambda r: r.file_path)
+
+        if 'json' in self.formats:
+            self._write_json(self.output_dir / f"{name}_results.json", {
+                'files': [self._file_summary(r) for r in file_results],
+                'passed': sum(1 for r in file_results if r.passed),
+                'errors': sum(1 for r in file_results if r.error),
+                'total': len(file_results),
+            })
+        if 'csv' in self.formats:
+            rows = []
+            for file_result in file_results:
+                if file_result.error:
+                    rows.append({'file': file_result.file_path, 'error': file_result.error})
+                for result in file_result.results.values():
+                    rows.append({'file': file_result.file_path, **self._channel_row(result)})
+            self._write_csv(self.output_dir / f"{name}_results.csv",
+                            ['file'] + CHANNEL_FIELDS + ['error'], rows)
+
+    def _file_summary(self, file_result: FileResult) -> Dict[str, Any]:
+        return {
+            'file': file_result.file_path,
+            'passed': file_result.passed,
+            'error': file_result.error,
+            'duration': file_result.duration,
+            'channels': {name: self._channel_summary(result)
+                         for name, result in file_result.results.items()},
+        }
+
+    def _channel_summary(self, result: AnalysisResult) -> Dict[str, Any]:
+        # The intervals repeat the start and end times of the segments
+        statistics = {key: value for key, value in result.statistics.items()
+                      if key != 'violation_intervals'}
+        segments = result.segments
+        return {
+            'passed': result.passed,
+            'max_deviation': result.max_deviation,
+            'start_time': result.start_time,
+            'end_time': result.end_time,
+            'evaluated_samples': result.evaluated_samples,
+            'evaluated_duration': result.evaluated_duration,
+            'analysis_time': result.analysis_time.isoformat(),
+            'statistics': statistics,
+            'segments': [dict(zip(segments.dtype.names, record))
+                         for record in segments.tolist()],
+        }
+
+    def _channel_row(self, result: AnalysisResult) -> Dict[str, Any]:
+        segments = result.segments
+        return {
+            'channel': result.channel_name,
+            'passed': result.passed,
+            'max_deviation': result.max_deviation,
+            'violation_segments': len(segments),
+            'total_violations': result.violation_count,
+            'violation_duration': float(
+                (segments['end_time'] - segments['start_time']).sum()),
+            'evaluated_samples': result.evaluated_samples,
+            'evaluated_duration': result.evaluated_duration,
+            'start_time': result.start_time,
+            'end_time': result.end_time,
+        }
+
+    def _write_json(self, path: Path, data: Dict[str, Any]) -> None:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, default=self._json_default)
+
+    def _json_default(self, value):
+        # numpy scalars from statistics
+        if isinstance(value, np.generic):
+            return value.item()
+        raise TypeError(f"Cannot export {type(value).__name__}")
+
+    def _write_csv(self, path: Path, fields: List[str], rows: List[Dict[str, Any]]) -> None:
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=fields)
+            writer.writeheader()
+            writer.writerows(rows)
+
+    def _write_npz(self, path: Path, results: Dict[str, AnalysisResult]) -> None:
+        arrays = {f"segments_{i}": result.segments
+                  for i, result in enumerate(results.values())}
+        arrays['channels'] = np.array(list(results), dtype=str)
+        np.savez_compressed(path, **arrays)
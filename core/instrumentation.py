@@ -0,0 +1,252 @@
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+import tracemalloc
+from collections import deque
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+class Span:
+    """
+    One timed stage, e.g. a file, a channel or a step of its analysis.
+
+    Attributes such as sample counts and bytes touched are set with
+    set(). peak_bytes is the traced memory peak above the memory in use
+    when the span started, if memory tracing is enabled.
+    """
+
+    __slots__ = ('name', 'attributes', 'parent', 'children', 'start', 'duration',
+                 'peak_bytes', '_start_memory', '_peak_memory', '_started')
+
+    def __init__(self, name: str, attributes: Dict[str, Any], parent: Optional['Span']):
+        self.name = name
+        self.attributes = attributes
+        self.parent = parent
+        self.children: List['Span'] = []
+        # Wall clock start, for traces; duration is measured monotonically
+        self.start = time.time()
+        self.duration: float = 0.0
+        self.peak_bytes: Optional[int] = None
+        self._start_memory = 0
+        self._peak_memory = 0
+        self._started = 0.0
+
+    @property
+    def path(self) -> str:
+        """Names of all enclosing spans and this one, joined by '/'."""
+        return self.name if self.parent is None else f"{self.parent.path}/{self.name}"
+
+    def set(self, **attributes: Any) -> None:
+        """Adds or replaces attributes."""
+        self.attributes.update(attributes)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-serializable form including all nested spans."""
+        data = {
+            'name': self.name,
+            'start': self.start,
+            'duration': self.duration,
+            'attributes': self.attributes,
+        }
+        if self.peak_bytes is not None:
+            data['peak_bytes'] = self.peak_bytes
+        if self.children:
+            data['children'] = [child.to_dict() for child in self.children]
+        return data
+
+class _NullSpan:
+    """Stands in for a Span while instrumentation is disabled."""
+
+    __slots__ = ()
+
+    def __enter__(self) -> '_NullSpan':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        pass
+
+    def set(self, **attributes: Any) -> None:
+        pass
+
+_NULL_SPAN = _NullSpan()
+
+class _ActiveSpan:
+    __slots__ = ('instrumentation', 'span')
+
+    def __init__(self, instrumentation: 'Instrumentation', span: Span):
+        self.instrumentation = instrumentation
+        self.span = span
+
+    def __enter__(self) -> Span:
+        self.instrumentation._enter(self.span)
+        return self.span
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        if exc_type is not None:
+            self.span.attributes['error'] = exc_type.__name__
+        self.instrumentation._exit(self.span)
+
+class Instrumentation:
+    """
+    Nested timing spans with optional memory peaks.
+
+    Usage:
+        with instrumentation.span('channel', channel=name) as span:
+            ...
+            span.set(samples=len(data))
+
+    Spans nest per thread. Every finished span is passed to the hooks
+    registered with add_hook; finished root spans are kept (the last
+    max_traces of them, all if None) for write_trace, and per-stage totals for
+    prometheus. While disabled, span() returns a shared no-op object,
+    so instrumented code costs one method call per span.
+
+    With trace_memory, tracemalloc is started and each span records its
+    peak memory. tracemalloc measures the whole process, so only spans
+    on the thread that created the instance record memory; spans on
+    other threads have no peak_bytes. Tracing memory slows down
+    allocation-heavy code noticeably and is meant for diagnosis.
+    """
+    def __init__(self, enabled: bool = True, trace_memory: bool = False,
+                 max_traces: Optional[int] = 100):
+        self.logger = logging.getLogger(__name__)
+        self.enabled = enabled
+        self.trace_memory = trace_memory
+        self.traces: "deque[Span]" = deque(maxlen=max_traces)
+        self._hooks: List[Callable[[Span], None]] = []
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        # Span path -> {'count', 'seconds', 'samples', 'bytes', 'peak_bytes'}
+        self._totals: Dict[str, Dict[str, float]] = {}
+        self._started_tracemalloc = False
+        self._memory_thread = threading.get_ident()
+        if enabled and trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+
+    def close(self) -> None:
+        """Stops tracemalloc if this instance started it."""
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+
+    def add_hook(self, hook: Callable[[Span], None]) -> None:
+        """Registers hook(span), called whenever a span finishes."""
+        self._hooks.append(hook)
+
+    def span(self, name: str, **attributes: Any):
+        """Context manager timing a stage nested in the current span."""
+        if not self.enabled:
+            return _NULL_SPAN
+        return _ActiveSpan(self, Span(name, attributes, self.current()))
+
+    def current(self) -> Optional[Span]:
+        """Innermost open span of the calling thread."""
+        stack = getattr(self._local, 'stack', None)
+        return stack[-1] if stack else None
+
+    def _enter(self, span: Span) -> None:
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        stack.append(span)
+
+        if self._traces_memory():
+            current, peak = tracemalloc.get_traced_memory()
+            # The enclosing span keeps the peak reached so far
+            if span.parent is not None:
+                span.parent._peak_memory = max(span.parent._peak_memory, peak)
+            tracemalloc.reset_peak()
+            span._start_memory = span._peak_memory = current
+        span._started = time.perf_counter()
+
+    def _exit(self, span: Span) -> None:
+        span.duration = time.perf_counter() - span._started
+        if self._traces_memory():
+            span._peak_memory = max(span._peak_memory, tracemalloc.get_traced_memory()[1])
+            span.peak_bytes = span._peak_memory - span._start_memory
+            if span.parent is not None:
+                span.parent._peak_memory = max(span.parent._peak_memory, span._peak_memory)
+
+        self._local.stack.pop()
+        if span.parent is not None:
+            span.parent.children.append(span)
+        else:
+            self.traces.append(span)
+        self._add_totals(span)
+
+        for hook in self._hooks:
+            try:
+                hook(span)
+            except Exception as e:
+                self.logger.error(f"Instrumentation hook failed: {str(e)}")
+
+    def _traces_memory(self) -> bool:
+        return (self.trace_memory and tracemalloc.is_tracing()
+                and threading.get_ident() == self._memory_thread)
+
+    def _add_totals(self, span: Span) -> None:
+        with self._lock:
+            totals = self._totals.setdefault(span.path, {
+                'count': 0, 'seconds': 0.0, 'samples': 0, 'bytes': 0, 'peak_bytes': 0})
+            totals['count'] += 1
+            totals['seconds'] += span.duration
+            totals['samples'] += span.attributes.get('samples', 0)
+            totals['bytes'] += span.attributes.get('bytes', 0)
+            if span.peak_bytes is not None:
+                totals['peak_bytes'] = max(totals['peak_bytes'], span.peak_bytes)
+
+    def totals(self) -> Dict[str, Dict[str, float]]:
+        """Per span path: count, seconds, samples, bytes and largest peak_bytes."""
+        with self._lock:
+            return {path: dict(totals) for path, totals in self._totals.items()}
+
+    def trace(self) -> List[Dict[str, Any]]:
+        """The kept root spans with their nested spans."""
+        return [span.to_dict() for span in list(self.traces)]
+
+    def prometheus(self, prefix: str = 'measurement_analysis') -> str:
+        """Per-stage totals in the Prometheus text exposition format."""
+        metrics = [
+            ('stage_calls_total', 'counter', 'count', "Finished spans per stage"),
+            ('stage_seconds_total', 'counter', 'seconds', "Seconds spent per stage"),
+            ('stage_samples_total', 'counter', 'samples', "Samples processed per stage"),
+            ('stage_bytes_total', 'counter', 'bytes', "Bytes touched per stage"),
+        ]
+        if self.trace_memory:
+            metrics.append(('stage_peak_bytes', 'gauge', 'peak_bytes',
+                            "Largest traced memory peak per stage"))
+
+        totals = self.totals()
+        lines = []
+        for metric, kind, key, description in metrics:
+            name = f"{prefix}_{metric}"
+            lines.append(f"# HELP {name} {description}")
+            lines.append(f"# TYPE {name} {kind}")
+            for path in sorted(totals):
+                stage = path.replace('\\', '\\\\').replace('"', '\\"')
+                lines.append(f'{name}{{stage="{stage}"}} {totals[path][key]}')
+        return '\n'.join(lines) + '\n'
+
+    def write_trace(self, path: Path) -> None:
+        """Writes the kept root spans as JSON."""
+        self._write(path, json.dumps(self.trace(), indent=2, default=str))
+
+    def write_prometheus(self, path: Path) -> None:
+        """Writes prometheus() atomically, e.g. for the node exporter's textfile collector."""
+        self._write(path, self.prometheus())
+
+    def _write(self, path: Path, text: str) -> None:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(text)
+            os.replace(tmp, path)
+        except Exception:
+            os.unlink(tmp)
+            raise
@@ -0,0 +1,210 @@
+import logging
+import queue
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from .instrumentation import Instrumentation
+from .types import FileResult
+
+# Put on a queue after the last file
+_DONE = object()
+
+class _Job:
+    """One file on its way through the pipeline."""
+
+    __slots__ = ('index', 'mf4_file', 'report', 'channels', 'configs', 'results',
+                 'error', 'start')
+
+    def __init__(self, index: int, mf4_file: Path):
+        self.index = index
+        self.mf4_file = mf4_file
+        self.report = False
+        self.channels: Optional[Dict[str, Any]] = None
+        self.configs: Optional[Dict[str, Any]] = None
+        self.results: Dict[str, Any] = {}
+        self.error: Optional[str] = None
+        self.start = time.perf_counter()
+
+class Pipeline:
+    """
+    Analyzes files in three overlapping stages connected by bounded queues.
+
+    prefetch: opens a file and decodes the channels its analysis (and
+        report) needs, on prefetch_workers threads
+    analysis: processes the channels and runs the threshold analysis, on
+        analysis_workers threads
+    report: writes the PDF report and the exports on one thread, as
+        pyplot is not thread-safe; the pages are rendered by the
+        ReportGenerator's own worker processes
+
+    While one file is analyzed, the next ones are read and the report of
+    the previous one is written, so throughput is bound by the slowest
+    stage instead of the sum of all three. Each queue holds at most
+    queue_size files, which bounds the decoded files kept in memory when
+    a later stage falls behind. Reading and decoding spend most of their
+    time in file I/O, zlib and numpy, which release the GIL.
+
+    Analyzers keep per-file state, so every prefetch and analysis thread
+    gets its own from analyzer_factory; share one ConfigHandler between
+    them. A failing file is recorded as a FileResult with an error and
+    does not stop the others.
+
+    With sequential, the stages run one after another in the calling
+    thread, e.g. to trace memory, which tracemalloc only measures per
+    process.
+    """
+    def __init__(self, analyzer_factory: Callable[[], Any], report_generator=None,
+                 exporter=None, prefetch_workers: int = 1, analysis_workers: int = 1,
+                 queue_size: int = 2, instrumentation: Optional[Instrumentation] = None,
+                 sequential: bool = False):
+        self.logger = logging.getLogger(__name__)
+        self.analyzer_factory = analyzer_factory
+        self.report_generator = report_generator
+        self.exporter = exporter
+        self.prefetch_workers = max(1, prefetch_workers)
+        self.analysis_workers = max(1, analysis_workers)
+        self.queue_size = max(1, queue_size)
+        self.sequential = sequential
+        self.instrumentation = instrumentation or Instrumentation(enabled=False)
+        self._local = threading.local()
+
+    def run(self, mf4_files: List[Path],
+            on_result: Optional[Callable[[FileResult], None]] = None) -> List[FileResult]:
+        """
+        Analyzes mf4_files.
+
+        Args:
+            mf4_files: Files to analyze
+            on_result: Called in the calling thread with each FileResult as
+                soon as the file has left the last stage
+
+        Returns:
+            The FileResults in the order of mf4_files
+        """
+        results: List[Optional[FileResult]] = [None] * len(mf4_files)
+        for job in self._jobs(mf4_files):
+            file_result = FileResult(
+                str(job.mf4_file), job.results, error=job.error,
+                duration=time.perf_counter() - job.start)
+            results[job.index] = file_result
+            if on_result is not None:
+                on_result(file_result)
+        return results
+
+    def _jobs(self, mf4_files: List[Path]) -> Iterator[_Job]:
+        """Runs the stages and yields each job once it has left the last one."""
+        if self.sequential:
+            for index, mf4_file in enumerate(mf4_files):
+                job = _Job(index, Path(mf4_file))
+                for work in (self._prefetch, self._analyze, self._report):
+                    self._run_step(work, job)
+                yield job
+            return
+
+        # Jobs are small until prefetched, so the input queue is unbounded
+        pending: queue.Queue = queue.Queue()
+        prefetched: queue.Queue = queue.Queue(maxsize=self.queue_size)
+        analyzed: queue.Queue = queue.Queue(maxsize=self.queue_size)
+        finished: queue.Queue = queue.Queue()
+        for index, mf4_file in enumerate(mf4_files):
+            pending.put(_Job(index, Path(mf4_file)))
+        pending.put(_DONE)
+
+        self._start_stage('prefetch', self._prefetch, pending, prefetched,
+                          self.prefetch_workers)
+        self._start_stage('analysis', self._analyze, prefetched, analyzed,
+                          self.analysis_workers)
+        self._start_stage('report', self._report, analyzed, finished, 1)
+
+        while True:
+            job = finished.get()
+            if job is _DONE:
+                return
+            yield job
+
+    def _start_stage(self, name: str, work: Callable[[_Job], None], source: queue.Queue,
+                     sink: queue.Queue, workers: int) -> None:
+        remaining = [workers]
+        lock = threading.Lock()
+
+        def run() -> None:
+            while True:
+                job = source.get()
+                if job is _DONE:
+                    # Leave it for the other workers of this stage
+                    source.put(_DONE)
+                    break
+                self._run_step(work, job)
+                # Blocks while the next stage is behind (backpressure)
+                sink.put(job)
+            with lock:
+                remaining[0] -= 1
+                last = remaining[0] == 0
+            if last:
+                sink.put(_DONE)
+
+        for i in range(workers):
+            threading.Thread(target=run, name=f"{name}-{i}", daemon=True).start()
+
+    def _run_step(self, work: Callable[[_Job], None], job: _Job) -> None:
+        if job.error is not None:
+            return
+        try:
+            work(job)
+        except Exception as e:
+            self.logger.error(f"Failed to process {job.mf4_file}: {str(e)}", exc_info=True)
+            job.error = f"{type(e).__name__}: {e}"
+            job.channels = None
+
+    def _analyzer(self):
+        """The calling thread's analyzer."""
+        analyzer = getattr(self._local, 'analyzer', None)
+        if analyzer is None:
+            analyzer = self._local.analyzer = self.analyzer_factory()
+        return analyzer
+
+    def _prefetch(self, job: _Job) -> None:
+        job.start = time.perf_counter()
+        analyzer = self._analyzer()
+        with self.instrumentation.span('prefetch', file=str(job.mf4_file)) as span:
+            config = analyzer.config_handler.snapshot.config
+            stale = analyzer.stale_channels(job.mf4_file)
+            # Reports are only redrawn if a result changed or the PDF is missing
+            job.report = self.report_generator is not None and (
+                not self.report_generator.report_path(job.mf4_file).exists() or bool(stale))
+            required = config if job.report else {name: config[name] for name in stale}
+            if not required:
+                return
+
+            channels = analyzer.file_handler.extract_channels(job.mf4_file, required)
+            samples = 0
+            for name, channel in list(channels.items()):
+                try:
+                    samples += len(channel.data)
+                except Exception as e:
+                    # The analysis extracts it again and reports the error per channel
+                    self.logger.warning(f"Could not prefetch {name} of {job.mf4_file}: {str(e)}")
+                    del channels[name]
+            span.set(channels=len(channels), samples=samples)
+            job.channels = channels
+
+    def _analyze(self, job: _Job) -> None:
+        analyzer = self._analyzer()
+        job.results = analyzer.analyze_file(
+            job.mf4_file, plot_data=job.report, channels=job.channels)
+        # Only the report needs the processed channels
+        job.channels = dict(analyzer.channels) if job.report else None
+        job.configs = dict(analyzer.config)
+
+    def _report(self, job: _Job) -> None:
+        try:
+            if job.report:
+                self.report_generator.generate_report(
+                    job.results, job.mf4_file, job.channels, job.configs)
+            if self.exporter is not None:
+                self.exporter.export(job.results, job.mf4_file,
+                                     duration=time.perf_counter() - job.start)
+        finally:
+            job.channels = None
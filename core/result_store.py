@@ -0,0 +1,125 @@
+import hashlib
+import json
+import logging
+import os
+import pickle
+import shutil
+import tempfile
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from data.content_hash import ContentHashes
+from .types import AnalysisResult
+
+# Modules whose source determines analysis results, relative to the repository root
+_RESULT_MODULES = (
+    'analysis', 'config/config_handler.py', 'config/validators.py', 'core/analyzer.py',
+    'core/types.py', 'data/file_handler.py', 'data/reader.py', 'data/channel.py',
+    'data/source_index.py', 'data/disk_cache.py',
+)
+
+@lru_cache(maxsize=None)
+def code_version() -> Optional[str]:
+    """
+    Hash of the source of all modules that affect analysis results, so
+    stored results are not reused after the analysis code changed.
+
+    Returns None if the sources are not available, e.g. in a frozen
+    build, where stored results can then not be reused safely.
+    """
+    root = Path(__file__).resolve().parent.parent
+    digest = hashlib.blake2b(digest_size=12)
+    try:
+        for name in _RESULT_MODULES:
+            path = root / name
+            for source in sorted(path.rglob('*.py')) if path.is_dir() else [path]:
+                digest.update(source.relative_to(root).as_posix().encode())
+                digest.update(source.read_bytes())
+    except OSError as e:
+        logging.getLogger(__name__).warning(
+            f"Analysis code not readable, stored results are not reused: {str(e)}")
+        return None
+    return digest.hexdigest()
+
+class ResultStore:
+    """
+    Persistent store of analysis results for incremental re-analysis.
+
+    Results are keyed by the content hash of the MF4 file, a hash
+    of the channel's configuration row and the code version, so a stored
+    result is only reused while none of them changed. Each result is a
+    pickled AnalysisResult under <fingerprint>/<key>.pkl, written
+    atomically. Content hashes are memoized in hashes.json (see
+    ContentHashes), so unchanged files are not read again by later runs.
+
+    Without a code version (see code_version), nothing is loaded or
+    stored.
+    """
+    def __init__(self, directory: Path, version: Optional[str] = None):
+        self.logger = logging.getLogger(__name__)
+        self.directory = Path(directory)
+        self.version = version or code_version()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._hashes = ContentHashes(self.directory / 'hashes.json')
+
+    def fingerprint(self, file_path: Path) -> str:
+        """Content hash of file_path; empty without a code version."""
+        if self.version is None:
+            return ''
+        return self._hashes.get(file_path)
+
+    def config_hash(self, channel_name: str, config: Dict[str, Any]) -> str:
+        """Hash of a channel's configuration row and the code version."""
+        key = json.dumps([channel_name, config, self.version], sort_keys=True, default=str)
+        return hashlib.blake2b(key.encode('utf-8'), digest_size=16).hexdigest()
+
+    def load(self, fingerprint: str, channel_name: str,
+             config: Dict[str, Any]) -> Optional[AnalysisResult]:
+        """Returns the stored result, or None if there is none for this key."""
+        if self.version is None:
+            return None
+        path = self._entry_path(fingerprint, channel_name, config)
+        try:
+            with open(path, 'rb') as f:
+                result = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            self.logger.warning(f"Ignoring unreadable stored result {path}: {str(e)}")
+            return None
+        return result if isinstance(result, AnalysisResult) else None
+
+    def contains(self, fingerprint: str, channel_name: str, config: Dict[str, Any]) -> bool:
+        """True if a result is stored for this key."""
+        if self.version is None:
+            return False
+        return self._entry_path(fingerprint, channel_name, config).is_file()
+
+    def store(self, fingerprint: str, channel_name: str, config: Dict[str, Any],
+              result: AnalysisResult) -> None:
+        """Writes a result, replacing any previous one for this key."""
+        if self.version is None:
+            return
+        path = self._entry_path(fingerprint, channel_name, config)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, path)
+        except Exception:
+            os.unlink(tmp)
+            raise
+
+    def clear(self) -> None:
+        """Removes all stored results."""
+        for path in self.directory.iterdir():
+            if path.is_dir():
+                shutil.rmtree(path, ignore_errors=True)
+            else:
+                path.unlink()
+
+    def _entry_path(self, fingerprint: str, channel_name: str,
+                    config: Dict[str, Any]) -> Path:
+        return self.directory / fingerprint / f"{self.config_hash(channel_name, config)}.pkl"
@@ -1,50 +1,194 @@
 from typing import List, Optional, Dict, Any
 from datetime import datetime
+import numpy as np
+
+# One record per contiguous run of samples outside the tolerance band
+SEGMENT_DTYPE = np.dtype([
+    ('start_time', np.float64),
+    ('end_time', np.float64),
+    ('sample_count', np.int64),
+    ('peak_deviation', np.float64),
+    ('peak_timestamp', np.float64),
+    ('peak_value', np.float64),
+])
 
 class ChannelConfig:
-    """Configuration settings for a measurement channel."""
-    
-    def __init__(self, name: str):
-        self.name = name
-        self.setpoint_channel: Optional[str] = None
-        self.static_setpoint: Optional[float] = None
-        self.static_tolerance: float = 0.0
-        self.scaling: float = 1.0
-        self.back2back_id: str = ""
-        self.back2back_id_position: int = 0
-        self.unit: str = ""
-        self.test_flag_channel: Optional[str] = None
-        self.start_time: Optional[float] = None
-        self.end_time: Optional[float] = None
-        self.test_flag: Optional[int] = None
+    """
+    Configuration settings for a measurement channel.
+
+    Instances are immutable; they are compiled once per configuration
+    load and shared by all analyses.
+    """
+
+    __slots__ = (
+        'name', 'setpoint_channel', 'static_setpoint', 'static_tolerance',
+        'scaling', 'back2back_id', 'back2back_id_position', 'unit',
+        'test_flag_channel', 'start_time', 'end_time', 'test_flag',
+    )
+
+    def __init__(self, name: str, setpoint_channel: Optional[str] = None,
+                 static_setpoint: Optional[float] = None,
+                 static_tolerance: float = 0.0, scaling: float = 1.0,
+                 back2back_id: str = "", back2back_id_position: int = 0,
+                 unit: str = "", test_flag_channel: Optional[str] = None,
+                 start_time: Optional[float] = None, end_time: Optional[float] = None,
+                 test_flag: Optional[int] = None):
+        # Immutable, so fields are set around __setattr__
+        set_field = object.__setattr__
+        set_field(self, 'name', name)
+        set_field(self, 'setpoint_channel', setpoint_channel)
+        set_field(self, 'static_setpoint', static_setpoint)
+        set_field(self, 'static_tolerance', static_tolerance)
+        set_field(self, 'scaling', scaling)
+        set_field(self, 'back2back_id', back2back_id)
+        set_field(self, 'back2back_id_position', back2back_id_position)
+        set_field(self, 'unit', unit)
+        set_field(self, 'test_flag_channel', test_flag_channel)
+        set_field(self, 'start_time', start_time)
+        set_field(self, 'end_time', end_time)
+        set_field(self, 'test_flag', test_flag)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError(f"ChannelConfig is immutable, cannot set {name}")
+
+    def __delattr__(self, name: str) -> None:
+        raise AttributeError(f"ChannelConfig is immutable, cannot delete {name}")
+
+    def __getstate__(self) -> Dict[str, Any]:
+        return {field: getattr(self, field) for field in self.__slots__}
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        for field, value in state.items():
+            object.__setattr__(self, field, value)
+
+    def _fields(self) -> tuple:
+        return tuple(getattr(self, field) for field in self.__slots__)
+
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, ChannelConfig):
+            return NotImplemented
+        return self._fields() == other._fields()
+
+    def __hash__(self) -> int:
+        return hash(self._fields())
+
+    def __repr__(self) -> str:
+        fields = ', '.join(f"{field}={getattr(self, field)!r}" for field in self.__slots__)
+        return f"ChannelConfig({fields})"
+
+    def replace(self, **changes: Any) -> 'ChannelConfig':
+        """Returns a copy with the given fields changed."""
+        return ChannelConfig(**{**self.__getstate__(), **changes})
 
 class AnalysisResult:
     """Results from analyzing a measurement channel."""
-    
+
+    __slots__ = (
+        'channel_name', 'passed', 'max_deviation', 'analysis_time',
+        'start_time', 'end_time', 'evaluated_samples', 'evaluated_duration',
+        'statistics', '_segments', '_segment_count',
+    )
+
+    # Minimum number of segment records allocated when the buffer grows
+    SEGMENT_CHUNK = 16
+
     def __init__(self, channel_name: str):
         self.channel_name = channel_name
         self.passed: bool = False
-        self.violations: List[Dict[str, float]] = []
         self.max_deviation: float = 0.0
         self.analysis_time: datetime = datetime.now()
         self.start_time: Optional[float] = None
         self.end_time: Optional[float] = None
+        # Samples and seconds actually checked, e.g. inside the test phase
+        self.evaluated_samples: int = 0
+        self.evaluated_duration: float = 0.0
         self.statistics: Dict[str, Any] = {}
+        self._segments = np.empty(0, dtype=SEGMENT_DTYPE)
+        self._segment_count = 0
 
-    def add_violation(self, timestamp: float, value: float, deviation: float) -> None:
-        """Add a threshold violation."""
-        self.violations.append({
-            'timestamp': timestamp,
-            'value': value,
-            'deviation': deviation
-        })
-        self.max_deviation = max(self.max_deviation, abs(deviation))
+    def __getstate__(self) -> Dict[str, Any]:
+        # Ship only the used part of the segment buffer
+        state = {name: getattr(self, name) for name in self.__slots__}
+        state['_segments'] = self.segments.copy()
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        for name, value in state.items():
+            setattr(self, name, value)
+
+    @property
+    def segments(self) -> np.ndarray:
+        """Structured array (SEGMENT_DTYPE) of all violation segments."""
+        return self._segments[:self._segment_count]
+
+    @property
+    def violation_count(self) -> int:
+        """Total number of violating samples over all segments."""
+        return int(self.segments['sample_count'].sum())
+
+    def add_segment(self, start_time: float, end_time: float, sample_count: int,
+                    peak_deviation: float, peak_timestamp: float,
+                    peak_value: float) -> None:
+        """Add a single violation segment."""
+        self.add_segments(
+            np.array([(start_time, end_time, sample_count, peak_deviation,
+                       peak_timestamp, peak_value)], dtype=SEGMENT_DTYPE))
+
+    def add_segments(self, records: np.ndarray) -> None:
+        """
+        Append a structured array of violation segments.
+
+        The buffer grows geometrically, so repeated appends are amortized.
+        """
+        count = len(records)
+        if not count:
+            return
+
+        required = self._segment_count + count
+        if required > len(self._segments):
+            capacity = max(required, 2 * len(self._segments), self.SEGMENT_CHUNK)
+            grown = np.empty(capacity, dtype=SEGMENT_DTYPE)
+            grown[:self._segment_count] = self.segments
+            self._segments = grown
+
+        self._segments[self._segment_count:required] = records
+        self._segment_count = required
+        self.max_deviation = max(self.max_deviation,
+                                 float(np.abs(records['peak_deviation']).max()))
 
     def calculate_statistics(self) -> None:
         """Calculate basic statistics for the analysis."""
-        if self.violations:
+        segments = self.segments
+        self.statistics.update({
+            'evaluated_samples': self.evaluated_samples,
+            'evaluated_duration': self.evaluated_duration,
+        })
+        if len(segments):
             self.statistics.update({
-                'total_violations': len(self.violations),
+                'total_violations': self.violation_count,
+                'violation_segments': len(segments),
                 'max_deviation': self.max_deviation,
-                'violation_times': [v['timestamp'] for v in self.violations]
-            })
\ No newline at end of file
+                'violation_duration': float(
+                    (segments['end_time'] - segments['start_time']).sum()),
+                'violation_intervals': list(zip(
+                    segments['start_time'].tolist(),
+                    segments['end_time'].tolist()))
+            })
+
+class FileResult:
+    """Outcome of analyzing one MF4 file in a batch."""
+
+    __slots__ = ('file_path', 'results', 'error', 'duration')
+
+    def __init__(self, file_path: str, results: Optional[Dict[str, AnalysisResult]] = None,
+                 error: Optional[str] = None, duration: float = 0.0):
+        self.file_path = file_path
+        self.results = results or {}
+        self.error = error
+        self.duration = duration
+
+    @property
+    def passed(self) -> bool:
+        """True if the file was analyzed and every channel passed."""
+        return (self.error is None and bool(self.results)
+                and all(r.passed for r in self.results.values()))
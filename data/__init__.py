@@ -1,4 +1,26 @@
-from .file_handler import FileHandler
-from .channel import Channel
+import importlib
 
-__all__ = ['FileHandler', 'Channel']
\ No newline at end of file
+# Imported on first access (PEP 562), see core/__init__.py
+_EXPORTS = {
+    'FileHandler': '.file_handler',
+    'Channel': '.channel',
+    'RecordRangeReader': '.reader',
+    'MDFCache': '.cache',
+    'ChannelDiskCache': '.disk_cache',
+    'SourceIndex': '.source_index',
+    'ChannelCatalog': '.catalog',
+    'ContentHashes': '.content_hash',
+}
+
+__all__ = ['FileHandler', 'Channel', 'RecordRangeReader', 'MDFCache', 'ChannelDiskCache',
+           'SourceIndex', 'ChannelCatalog', 'ContentHashes']
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
\ No newline at end of file
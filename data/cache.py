@@ -0,0 +1,149 @@
+import logging
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional, Tuple, TYPE_CHECKING
+
+from .source_index import SourceIndex
+
+if TYPE_CHECKING:
+    import asammdf
+
+class _CacheEntry:
+    __slots__ = ('mdf', 'signature', 'size', 'source_index')
+
+    def __init__(self, mdf: 'asammdf.MDF', signature: Optional[Tuple[int, int]],
+                 size: int):
+        self.mdf = mdf
+        self.signature = signature
+        self.size = size
+        self.source_index: Optional[SourceIndex] = None
+
+class MDFCache:
+    """
+    Bounded LRU cache of loaded MDF objects.
+
+    Entries are evicted least recently used first once either the entry
+    count or the estimated memory exceeds its limit. The estimate is the
+    file size on disk, a conservative upper bound for what asammdf keeps
+    resident. Evicted objects are closed explicitly, and an entry whose
+    file mtime or size changed is invalidated instead of being reused.
+    Each entry also keeps the file's SourceIndex once it is built.
+    """
+    def __init__(self, max_entries: int = 8, max_bytes: Optional[int] = 2 * 1024**3):
+        self.logger = logging.getLogger(__name__)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, _CacheEntry]" = OrderedDict()
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, file_path) -> bool:
+        return self._key(file_path) in self._entries
+
+    @property
+    def total_bytes(self) -> int:
+        return sum(entry.size for entry in self._entries.values())
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        return {
+            'entries': len(self._entries),
+            'bytes': self.total_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'invalidations': self.invalidations,
+        }
+
+    def get(self, file_path) -> Optional['asammdf.MDF']:
+        """Returns the cached MDF for file_path, or None on a miss."""
+        key = self._key(file_path)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.signature != self._signature(key):
+                self.logger.info(f"Invalidating changed file: {key}")
+                self._remove(key)
+                self.invalidations += 1
+                entry = None
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry.mdf
+
+    def put(self, file_path, mdf: 'asammdf.MDF') -> None:
+        """Adds mdf for file_path and evicts entries beyond the limits."""
+        key = self._key(file_path)
+        signature = self._signature(key)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            size = signature[1] if signature is not None else 0
+            self._entries[key] = _CacheEntry(mdf, signature, size)
+            self._evict()
+
+    def source_index(self, mdf: 'asammdf.MDF') -> SourceIndex:
+        """
+        Returns the SourceIndex of mdf, built on first use and kept with
+        its cache entry. Uncached MDF objects get a fresh index.
+        """
+        with self._lock:
+            for entry in self._entries.values():
+                if entry.mdf is mdf:
+                    if entry.source_index is None:
+                        entry.source_index = SourceIndex(mdf)
+                    return entry.source_index
+        return SourceIndex(mdf)
+
+    def invalidate(self, file_path) -> None:
+        """Removes and closes the entry for file_path, if cached."""
+        key = self._key(file_path)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+                self.invalidations += 1
+
+    def clear(self) -> None:
+        """Closes and removes all entries."""
+        with self._lock:
+            for key in list(self._entries):
+                self._remove(key)
+
+    def _evict(self) -> None:
+        # The most recently added entry is always kept, even if it alone
+        # exceeds the memory limit
+        while len(self._entries) > 1 and (
+                len(self._entries) > self.max_entries
+                or (self.max_bytes is not None and self.total_bytes > self.max_bytes)):
+            key = next(iter(self._entries))
+            self.logger.info(f"Evicting cached MF4 file: {key}")
+            self._remove(key)
+            self.evictions += 1
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key)
+        try:
+            entry.mdf.close()
+        except Exception as e:
+            self.logger.warning(f"Failed to close {key}: {str(e)}")
+
+    def _key(self, file_path) -> str:
+        return str(Path(file_path).resolve())
+
+    def _signature(self, key: str) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(key)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
@@ -0,0 +1,236 @@
+import logging
+import os
+import sqlite3
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    start_time TEXT,
+    scanned_at REAL NOT NULL,
+    error TEXT
+);
+CREATE TABLE IF NOT EXISTS groups (
+    file_id INTEGER NOT NULL,
+    group_index INTEGER NOT NULL,
+    source TEXT,
+    sample_count INTEGER NOT NULL,
+    start_time REAL,
+    end_time REAL,
+    PRIMARY KEY (file_id, group_index)
+);
+CREATE TABLE IF NOT EXISTS channels (
+    file_id INTEGER NOT NULL,
+    group_index INTEGER NOT NULL,
+    channel_index INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    source TEXT,
+    unit TEXT,
+    PRIMARY KEY (file_id, group_index, channel_index)
+);
+CREATE INDEX IF NOT EXISTS channels_by_name ON channels (name);
+"""
+
+def _source_name(source) -> Optional[str]:
+    return getattr(source, 'name', None) or None
+
+def _read_metadata(file_path: str) -> Dict[str, Any]:
+    """
+    Reads the header and channel metadata of one MF4 file; never raises.
+
+    Only the first and last master samples of each group are decoded, for
+    its time range.
+    """
+    metadata = {'path': file_path, 'groups': [], 'channels': [],
+                'start_time': None, 'error': None}
+    try:
+        import asammdf
+        with asammdf.MDF(file_path) as mdf:
+            metadata['start_time'] = mdf.header.start_time.isoformat()
+            for group_index, group in enumerate(mdf.groups):
+                cycles = group.channel_group.cycles_nr
+                group_source = _source_name(group.channel_group.acq_source)
+                start = end = None
+                if cycles:
+                    start = float(mdf.get_master(group_index, record_offset=0,
+                                                 record_count=1)[0])
+                    end = float(mdf.get_master(group_index, record_offset=cycles - 1,
+                                               record_count=1)[0])
+                metadata['groups'].append((group_index, group_source, cycles, start, end))
+
+                master_index = mdf.masters_db.get(group_index)
+                for channel_index, channel in enumerate(group.channels):
+                    if channel_index == master_index:
+                        continue
+                    metadata['channels'].append((
+                        group_index, channel_index, channel.name,
+                        _source_name(channel.source) or group_source,
+                        getattr(channel, 'unit', '') or ''))
+    except Exception as e:
+        metadata['error'] = f"{type(e).__name__}: {e}"
+    return metadata
+
+class ChannelCatalog:
+    """
+    Local SQLite catalog of the channels in an archive of MF4 files.
+
+    Stores files, data groups (source, sample count, time range) and
+    channels (source, unit) from MF4 metadata only. Scans run in parallel
+    and are incremental: files whose mtime and size are unchanged are not
+    opened again. Lookups only trust entries that still match the file on
+    disk.
+    """
+    def __init__(self, db_path: Path):
+        self.logger = logging.getLogger(__name__)
+        self.db_path = Path(db_path)
+        self._conn = sqlite3.connect(str(self.db_path))
+        self._conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def scan(self, directory: Path, workers: Optional[int] = None,
+             pattern: str = '*.mf4', prune: bool = True) -> Dict[str, int]:
+        """
+        Catalogs all files matching pattern below directory.
+
+        Args:
+            directory: Root of the archive, searched recursively
+            workers: Processes reading metadata (default: CPU count)
+            pattern: File name pattern
+            prune: Remove catalog entries of files below directory that
+                no longer exist
+
+        Returns:
+            Counts of scanned, unchanged, failed and removed files
+        """
+        known = {path: (mtime_ns, size) for path, mtime_ns, size in self._conn.execute(
+            "SELECT path, mtime_ns, size FROM files")}
+
+        found = set()
+        pending = []
+        for file_path in Path(directory).rglob(pattern):
+            path = str(file_path.resolve())
+            found.add(path)
+            if known.get(path) != self._signature(path):
+                pending.append(path)
+
+        stats = {'scanned': 0, 'unchanged': len(found) - len(pending),
+                 'failed': 0, 'removed': 0}
+        if pending:
+            self.logger.info(f"Scanning {len(pending)} of {len(found)} files in {directory}")
+        with self._conn:
+            for metadata in self._read_all(pending, workers):
+                self._store(metadata)
+                stats['scanned'] += 1
+                if metadata['error']:
+                    self.logger.warning(f"Failed to read {metadata['path']}: {metadata['error']}")
+                    stats['failed'] += 1
+
+            if prune:
+                root = str(Path(directory).resolve())
+                for path in known:
+                    if path not in found and Path(path).is_relative_to(root):
+                        self._delete(path)
+                        stats['removed'] += 1
+        return stats
+
+    def is_current(self, file_path: Path) -> bool:
+        """True if the file is cataloged and unchanged since its scan."""
+        return self._current_file_id(file_path) is not None
+
+    def channel_names(self, file_path: Path) -> Optional[Set[str]]:
+        """Channel names of a file, or None if it is not cataloged or changed."""
+        file_id = self._current_file_id(file_path)
+        if file_id is None:
+            return None
+        return {name for name, in self._conn.execute(
+            "SELECT DISTINCT name FROM channels WHERE file_id = ?", (file_id,))}
+
+    def missing_channels(self, file_path: Path, channel_names: Iterable[str]
+                         ) -> Optional[Set[str]]:
+        """
+        Returns which of channel_names the file lacks, or None if the
+        catalog has no current entry for it.
+        """
+        names = self.channel_names(file_path)
+        if names is None:
+            return None
+        return set(channel_names) - names
+
+    def files_with_channel(self, channel_name: str) -> List[str]:
+        """Paths of all cataloged files containing channel_name."""
+        return [path for path, in self._conn.execute(
+            "SELECT DISTINCT f.path FROM channels c JOIN files f ON f.id = c.file_id "
+            "WHERE c.name = ? ORDER BY f.path", (channel_name,))]
+
+    def channel_info(self, channel_name: str) -> List[Tuple]:
+        """
+        Returns (path, group, source, unit, sample count, start, end) for
+        every occurrence of channel_name.
+        """
+        return self._conn.execute(
+            "SELECT f.path, c.group_index, c.source, c.unit, g.sample_count, "
+            "g.start_time, g.end_time FROM channels c "
+            "JOIN files f ON f.id = c.file_id "
+            "JOIN groups g ON g.file_id = c.file_id AND g.group_index = c.group_index "
+            "WHERE c.name = ? ORDER BY f.path, c.group_index", (channel_name,)).fetchall()
+
+    def _read_all(self, paths: List[str], workers: Optional[int]) -> Iterable[Dict[str, Any]]:
+        workers = min(workers or os.cpu_count() or 1, len(paths))
+        if workers <= 1:
+            return map(_read_metadata, paths)
+        pool = ProcessPoolExecutor(max_workers=workers)
+        return self._drain(pool, pool.map(_read_metadata, paths, chunksize=8))
+
+    def _drain(self, pool: ProcessPoolExecutor, results: Iterable) -> Iterable:
+        with pool:
+            yield from results
+
+    def _store(self, metadata: Dict[str, Any]) -> None:
+        path = metadata['path']
+        signature = self._signature(path)
+        if signature is None:
+            return
+        self._delete(path)
+        file_id = self._conn.execute(
+            "INSERT INTO files (path, mtime_ns, size, start_time, scanned_at, error) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (path, *signature, metadata['start_time'], time.time(), metadata['error'])
+        ).lastrowid
+        self._conn.executemany(
+            "INSERT INTO groups VALUES (?, ?, ?, ?, ?, ?)",
+            [(file_id, *group) for group in metadata['groups']])
+        self._conn.executemany(
+            "INSERT INTO channels VALUES (?, ?, ?, ?, ?, ?)",
+            [(file_id, *channel) for channel in metadata['channels']])
+
+    def _delete(self, path: str) -> None:
+        row = self._conn.execute("SELECT id FROM files WHERE path = ?", (path,)).fetchone()
+        if row is None:
+            return
+        for table in ('channels', 'groups'):
+            self._conn.execute(f"DELETE FROM {table} WHERE file_id = ?", row)
+        self._conn.execute("DELETE FROM files WHERE id = ?", row)
+
+    def _current_file_id(self, file_path: Path) -> Optional[int]:
+        path = str(Path(file_path).resolve())
+        row = self._conn.execute(
+            "SELECT id, mtime_ns, size FROM files WHERE path = ? AND error IS NULL",
+            (path,)).fetchone()
+        if row is None or (row[1], row[2]) != self._signature(path):
+            return None
+        return row[0]
+
+    def _signature(self, path: str) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
@@ -1,32 +1,82 @@
 import numpy as np
-from typing import Dict, Any, Optional, Tuple
+from typing import Dict, Any, Optional, Tuple, Callable
+
+# Returns (data, timestamps, metadata) when a lazy channel is first accessed
+ChannelReader = Callable[[], Tuple[np.ndarray, np.ndarray, Dict[str, Any]]]
 
 class Channel:
-    def __init__(self, name: str, data: np.ndarray, timestamps: np.ndarray, 
-                 metadata: Optional[Dict[str, Any]] = None):
+    def __init__(self, name: str, data: Optional[np.ndarray] = None,
+                 timestamps: Optional[np.ndarray] = None,
+                 metadata: Optional[Dict[str, Any]] = None,
+                 reader: Optional[ChannelReader] = None):
         self.name = name
-        self.data = data
-        self.timestamps = timestamps
+        self._data = data
+        self._timestamps = timestamps
         self.metadata = metadata or {}
+        self._reader = reader
+        if reader is None:
+            self._validate_data()
+
+    @property
+    def data(self) -> np.ndarray:
+        self._load()
+        return self._data
+
+    @data.setter
+    def data(self, value: np.ndarray) -> None:
+        self._load()
+        self._data = value
+
+    @property
+    def timestamps(self) -> np.ndarray:
+        self._load()
+        return self._timestamps
+
+    @timestamps.setter
+    def timestamps(self, value: np.ndarray) -> None:
+        self._load()
+        self._timestamps = value
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._reader is None
+
+    def _load(self) -> None:
+        if self._reader is None:
+            return
+        reader, self._reader = self._reader, None
+        self._data, self._timestamps, metadata = reader()
+        self.metadata.update(metadata)
         self._validate_data()
 
     def _validate_data(self) -> None:
-        if len(self.data) != len(self.timestamps):
+        if len(self._data) != len(self._timestamps):
             raise ValueError(
-                f"Data length ({len(self.data)}) doesn't match timestamps "
-                f"length ({len(self.timestamps)})")
+                f"Data length ({len(self._data)}) doesn't match timestamps "
+                f"length ({len(self._timestamps)})")
 
     def get_timerange(self, start: Optional[float] = None, 
                      end: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray]:
-        mask = np.ones(len(self.timestamps), dtype=bool)
+        """Returns views of the samples with start <= t <= end (timestamps are sorted)."""
+        first = 0 if start is None else int(
+            np.searchsorted(self.timestamps, start, side='left'))
+        last = len(self.timestamps) if end is None else int(
+            np.searchsorted(self.timestamps, end, side='right'))
+        last = max(first, last)
         
-        if start is not None:
-            mask &= (self.timestamps >= start)
-        if end is not None:
-            mask &= (self.timestamps <= end)
-            
-        return self.data[mask], self.timestamps[mask]
+        return self.data[first:last], self.timestamps[first:last]
 
     def scale(self, factor: float) -> None:
-        if factor != 1.0:
-            self.data *= factor
\ No newline at end of file
+        """
+        Scales the samples. Writeable floating point data is scaled in place
+        and keeps its dtype; read-only data (e.g. memory-mapped) is copied.
+        Integer samples are explicitly promoted to float64.
+        """
+        if factor == 1.0:
+            return
+        if self.data.dtype.kind != 'f':
+            self.data = np.multiply(self.data, factor, dtype=np.float64)
+        elif self.data.flags.writeable:
+            np.multiply(self.data, factor, out=self.data)
+        else:
+            self.data = self.data * factor
\ No newline at end of file
@@ -0,0 +1,83 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+# Read size when hashing MF4 files
+HASH_BLOCK_BYTES = 4 * 1024 * 1024
+
+# Hashes computed by this process, shared by all ContentHashes
+_hashes: Dict[Tuple[str, int, int], str] = {}
+_lock = threading.Lock()
+
+def content_hash(file_path: Path) -> str:
+    """Hash of the complete content of file_path."""
+    digest = hashlib.blake2b(digest_size=20)
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_BYTES), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+class ContentHashes:
+    """
+    Content hashes of files, memoized per path, mtime and size.
+
+    Hashing reads the whole file, so known hashes are kept in memory for
+    the process and in memo_file (JSON, path -> [mtime_ns, size, hash])
+    for later runs and other processes. The memo file is rewritten
+    atomically after merging what other processes added; a lost update
+    only costs hashing the file again.
+    """
+    def __init__(self, memo_file: Path):
+        self.logger = logging.getLogger(__name__)
+        self.memo_file = Path(memo_file)
+
+    def get(self, file_path: Path) -> str:
+        """Returns the content hash of file_path."""
+        stat = os.stat(file_path)
+        path = str(Path(file_path).resolve())
+        memo_key = (path, stat.st_mtime_ns, stat.st_size)
+        with _lock:
+            if memo_key in _hashes:
+                return _hashes[memo_key]
+
+        entry = self._read().get(path)
+        if (isinstance(entry, list) and len(entry) == 3
+                and entry[:2] == [stat.st_mtime_ns, stat.st_size]):
+            digest = entry[2]
+        else:
+            digest = content_hash(file_path)
+            self._write(path, [stat.st_mtime_ns, stat.st_size, digest])
+        with _lock:
+            _hashes[memo_key] = digest
+        return digest
+
+    def _read(self) -> Dict[str, List]:
+        try:
+            with open(self.memo_file, encoding='utf-8') as f:
+                memo = json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"Ignoring unreadable hash memo {self.memo_file}: {str(e)}")
+            return {}
+        return memo if isinstance(memo, dict) else {}
+
+    def _write(self, path: str, entry: List) -> None:
+        try:
+            memo = self._read()
+            memo[path] = entry
+            fd, tmp = tempfile.mkstemp(dir=self.memo_file.parent, prefix='.tmp-')
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    json.dump(memo, f)
+                os.replace(tmp, self.memo_file)
+            except Exception:
+                os.unlink(tmp)
+                raise
+        except OSError as e:
+            self.logger.warning(f"Could not write hash memo {self.memo_file}: {str(e)}")
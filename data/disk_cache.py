@@ -0,0 +1,220 @@
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+from typing import Iterable, Optional, Tuple
+import numpy as np
+
+from .channel import Channel
+from .content_hash import ContentHashes
+
+# Seconds between full scans of the cache while the size tracked by this
+# process stays below the cap; other processes' writes are only seen by a scan
+SCAN_INTERVAL = 60.0
+
+class ChannelDiskCache:
+    """
+    Persistent cache of extracted channels as memory-mapped .npy files.
+
+    Entries are keyed by the content hash of the MF4 file (see
+    ContentHashes, memoized in hashes.json), the channel name, its
+    back2backID and back2backIDPosition and its time window, so no change
+    of the recording serves stale data. Each entry is a directory holding
+    data.npy, timestamps.npy and meta.json. Cached channels are
+    opened with mmap_mode='r', so analysis starts from zero-copy,
+    read-only arrays. Once the total size exceeds max_bytes, the least
+    recently used entries are removed.
+
+    The cache may be shared by several processes and threads: entries
+    are written to a temporary directory and renamed into place, a
+    concurrent writer of the same entry wins, and entries vanishing
+    during cleanup are skipped.
+    """
+    def __init__(self, directory: Path, max_bytes: Optional[int] = 10 * 1024**3):
+        self.logger = logging.getLogger(__name__)
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._hashes = ContentHashes(self.directory / 'hashes.json')
+        # Size as of the last scan plus what was stored since; None before a scan
+        self._size: Optional[int] = None
+        self._scanned = 0.0
+
+    def fingerprint(self, file_path: Path) -> str:
+        """Returns the content hash of file_path."""
+        return self._hashes.get(file_path)
+
+    def load(self, fingerprint: str, channel_name: str, back2back_id: str = '',
+             back2back_position: int = 0,
+             window: Tuple[Optional[float], Optional[float]] = (None, None)
+             ) -> Optional[Channel]:
+        """Returns the cached channel as memory-mapped arrays, or None."""
+        entry = self._entry_dir(
+            fingerprint, channel_name, back2back_id, back2back_position, window)
+        try:
+            with open(entry / 'meta.json', encoding='utf-8') as f:
+                metadata = json.load(f)
+            data = np.load(entry / 'data.npy', mmap_mode='r')
+            timestamps = np.load(entry / 'timestamps.npy', mmap_mode='r')
+        except (OSError, ValueError):
+            return None
+
+        os.utime(entry)
+        return Channel(channel_name, data, timestamps, metadata=metadata)
+
+    def store(self, fingerprint: str, channel: Channel, back2back_id: str = '',
+              back2back_position: int = 0,
+              window: Tuple[Optional[float], Optional[float]] = (None, None)) -> None:
+        """Writes a channel to the cache, replacing any previous entry."""
+        entry = self._entry_dir(
+            fingerprint, channel.name, back2back_id, back2back_position, window)
+        entry.parent.mkdir(parents=True, exist_ok=True)
+
+        source = channel.metadata.get('source')
+        metadata = {
+            'channel': channel.name,
+            'source_name': getattr(source, 'name', None),
+            'back2back_id': back2back_id,
+            'back2back_position': back2back_position,
+            'window': list(window),
+        }
+
+        try:
+            tmp = Path(tempfile.mkdtemp(dir=entry.parent, prefix='.tmp-'))
+        except FileNotFoundError:
+            # The file directory was just removed by a concurrent cleanup
+            entry.parent.mkdir(parents=True, exist_ok=True)
+            tmp = Path(tempfile.mkdtemp(dir=entry.parent, prefix='.tmp-'))
+        try:
+            data = self._plain(channel.data)
+            timestamps = self._plain(channel.timestamps)
+            np.save(tmp / 'data.npy', data)
+            np.save(tmp / 'timestamps.npy', timestamps)
+            with open(tmp / 'meta.json', 'w', encoding='utf-8') as f:
+                json.dump(metadata, f)
+            if entry.exists():
+                shutil.rmtree(entry, ignore_errors=True)
+            try:
+                os.replace(tmp, entry)
+            except OSError:
+                if not entry.is_dir():
+                    raise
+                # Another writer stored the same entry in the meantime
+                shutil.rmtree(tmp, ignore_errors=True)
+                return
+        except Exception:
+            shutil.rmtree(tmp, ignore_errors=True)
+            raise
+        if self._size is not None:
+            self._size += data.nbytes + timestamps.nbytes
+
+    def size(self) -> int:
+        """Total size in bytes of all cache entries."""
+        return sum(f.stat().st_size for f in self.directory.rglob('*') if f.is_file())
+
+    def cleanup(self, max_bytes: Optional[int] = None) -> int:
+        """
+        Removes least recently used entries until the cache fits max_bytes
+        (the configured cap if not given).
+
+        Without max_bytes, the cache is only scanned if the size tracked
+        since the last scan exceeds the cap or SCAN_INTERVAL has passed,
+        so calling this after every file stays cheap.
+
+        Returns:
+            Number of entries removed
+        """
+        if max_bytes is None:
+            max_bytes = self.max_bytes
+            if max_bytes is None:
+                return 0
+            if (self._size is not None and self._size <= max_bytes
+                    and time.monotonic() - self._scanned < SCAN_INTERVAL):
+                return 0
+
+        entries = []
+        for entry in self.directory.glob('*/*'):
+            # Entries being written by another process or thread
+            if entry.name.startswith('.tmp-'):
+                continue
+            try:
+                size = sum(f.stat().st_size for f in entry.iterdir())
+                entries.append((entry.stat().st_mtime, size, entry))
+            except OSError:
+                # Removed or replaced concurrently
+                continue
+
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, entry in sorted(entries, key=lambda e: e[0]):
+            if total <= max_bytes:
+                break
+            shutil.rmtree(entry, ignore_errors=True)
+            total -= size
+            removed += 1
+        self._size = total
+        self._scanned = time.monotonic()
+
+        # Drop file directories left empty
+        for file_dir in self.directory.iterdir():
+            try:
+                if file_dir.is_dir() and not any(file_dir.iterdir()):
+                    file_dir.rmdir()
+            except OSError:
+                # Refilled or removed by a concurrent writer or cleanup
+                continue
+
+        if removed:
+            self.logger.info(f"Removed {removed} cached channels from {self.directory}")
+        return removed
+
+    def invalidate_channels(self, channel_names: Iterable[str]) -> int:
+        """
+        Removes the entries of the given channels in every file.
+
+        Returns:
+            Number of entries removed
+        """
+        channel_names = set(channel_names)
+        removed = 0
+        for meta_path in self.directory.glob('*/*/meta.json'):
+            try:
+                with open(meta_path, encoding='utf-8') as f:
+                    channel = json.load(f).get('channel')
+            except (OSError, ValueError):
+                continue
+            if channel in channel_names:
+                shutil.rmtree(meta_path.parent, ignore_errors=True)
+                removed += 1
+        self._size = None
+
+        if removed:
+            self.logger.info(f"Invalidated {removed} cached entries of "
+                             f"{len(channel_names)} channels in {self.directory}")
+        return removed
+
+    def clear(self) -> None:
+        """Removes all cache entries."""
+        self._size = None
+        for path in self.directory.iterdir():
+            if path.is_dir():
+                shutil.rmtree(path, ignore_errors=True)
+            else:
+                path.unlink()
+
+    def _plain(self, array: np.ndarray) -> np.ndarray:
+        """Drops dtype metadata attached by asammdf, which .npy cannot store."""
+        dtype = array.dtype
+        plain = np.dtype(dtype.descr) if dtype.names else np.dtype(dtype.str)
+        return np.asarray(array).view(plain)
+
+    def _entry_dir(self, fingerprint: str, channel_name: str, back2back_id: str,
+                   back2back_position: int,
+                   window: Tuple[Optional[float], Optional[float]]) -> Path:
+        key = json.dumps([channel_name, back2back_id, back2back_position, list(window)])
+        return self.directory / fingerprint / hashlib.blake2b(
+            key.encode('utf-8'), digest_size=16).hexdigest()
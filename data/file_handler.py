@@ -1,35 +1,124 @@
 import logging
+from functools import partial
 from pathlib import Path
-from typing import Dict, List, Tuple, Optional
+from typing import Dict, Iterator, List, Tuple, Optional, TYPE_CHECKING
 import numpy as np
-import asammdf
 
+from .cache import MDFCache
 from .channel import Channel
+from .disk_cache import ChannelDiskCache
+from .reader import RecordRangeReader
+
+if TYPE_CHECKING:
+    # Imported by load_mf4 only, as asammdf is slow to import
+    import asammdf
+
+# (startTime, endTime), None where unbounded
+Window = Tuple[Optional[float], Optional[float]]
 
 class FileHandler:
-    def __init__(self):
+    def __init__(self, bulk_extraction: bool = True, cache_entries: int = 8,
+                 cache_bytes: Optional[int] = 2 * 1024**3,
+                 disk_cache: Optional[ChannelDiskCache] = None):
         self.logger = logging.getLogger(__name__)
-        self.cache: Dict[str, asammdf.MDF] = {}
+        self.cache = MDFCache(cache_entries, cache_bytes)
+        self.bulk_extraction = bulk_extraction
+        self.disk_cache = disk_cache
 
-    def load_mf4(self, file_path: Path) -> asammdf.MDF:
+    def load_mf4(self, file_path: Path) -> 'asammdf.MDF':
         try:
-            if str(file_path) in self.cache:
-                return self.cache[str(file_path)]
+            mdf = self.cache.get(file_path)
+            if mdf is not None:
+                return mdf
             
+            import asammdf
             self.logger.info(f"Loading MF4 file: {file_path}")
             mdf = asammdf.MDF(file_path, use_display_names=False)
             mdf.configure(integer_interpolation=0, float_interpolation=0)
             
-            self.cache[str(file_path)] = mdf
+            self.cache.put(file_path, mdf)
             return mdf
             
         except Exception as e:
             self.logger.error(f"Failed to load MF4 file: {str(e)}")
             raise
 
-    def filter_channels(self, mdf: asammdf.MDF, config: Dict[str, Dict]) -> Dict[str, Channel]:
+    def extract_channels(self, file_path: Path, config: Dict[str, Dict]) -> Dict[str, Channel]:
+        """
+        Extracts all configured channels of a file, serving them from the
+        on-disk channel cache where possible. The MF4 file is only opened
+        if at least one channel is not cached yet.
+        """
+        if self.disk_cache is None:
+            return self.filter_channels(self.load_mf4(file_path), config)
+        
+        fingerprint = self.disk_cache.fingerprint(file_path)
+        requests = self._channel_requests(config)
+        
+        channels = {}
+        missing = {}
+        for channel_name, (channel_config, window) in requests.items():
+            channel = self.disk_cache.load(
+                fingerprint, channel_name, channel_config.get('back2backID', ''),
+                self._back2back_position(channel_config), window)
+            if channel is None:
+                missing[channel_name] = (channel_config, window)
+            else:
+                channels[channel_name] = channel
+        
+        if not missing:
+            self.logger.info(f"All channels of {file_path} served from disk cache")
+            return channels
+        
+        extracted = self._extract_requests(self.load_mf4(file_path), missing)
+        # The disk cache only saves time; failing to update it must not fail the file
+        for channel_name, channel in extracted.items():
+            channel_config, window = missing[channel_name]
+            try:
+                self.disk_cache.store(
+                    fingerprint, channel, channel_config.get('back2backID', ''),
+                    self._back2back_position(channel_config), window)
+            except OSError as e:
+                self.logger.warning(f"Could not cache channel {channel_name}: {str(e)}")
+        try:
+            self.disk_cache.cleanup()
+        except OSError as e:
+            self.logger.warning(f"Disk cache cleanup failed: {str(e)}")
+        
+        channels.update(extracted)
+        return channels
+
+    def filter_channels(self, mdf: 'asammdf.MDF', config: Dict[str, Dict]) -> Dict[str, Channel]:
+        """Extracts all configured channels and their setpoint and test flag channels."""
+        return self._extract_requests(mdf, self._channel_requests(config))
+
+    def iter_channel_chunks(self, mdf: 'asammdf.MDF', channel_name: str, config: Dict,
+                            chunk_records: int) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Yields (samples, timestamps) of a channel in chunks of at most
+        chunk_records records, so only one chunk is decoded at a time.
+        """
+        location = self._resolve_channel(mdf, channel_name, config)
+        if location is None:
+            raise KeyError(f"Channel {channel_name} not found")
+        
+        group, index = location
+        record_total = mdf.groups[group].channel_group.cycles_nr
+        for record_offset in range(0, record_total, chunk_records):
+            signal = mdf.get(
+                group=group, index=index,
+                record_offset=record_offset,
+                record_count=min(chunk_records, record_total - record_offset)
+            )
+            yield signal.samples, signal.timestamps
+
+    def _extract_requests(self, mdf: 'asammdf.MDF', requests: Dict[str, Tuple[Dict, Window]]
+                          ) -> Dict[str, Channel]:
+        if self.bulk_extraction:
+            return self._extract_channels_bulk(mdf, requests)
+        
         channels = {}
-        for channel_name, channel_config in config.items():
+        for channel_name, (channel_config, _) in requests.items():
             try:
                 channel_data = self._extract_channel(mdf, channel_name, channel_config)
                 if channel_data:
@@ -40,37 +129,129 @@ class FileHandler:
 
         return channels
 
-    def _extract_channel(self, mdf: asammdf.MDF, channel_name: str, config: Dict) -> Optional[Channel]:
+    def _extract_channels_bulk(self, mdf: 'asammdf.MDF', requests: Dict[str, Tuple[Dict, Window]]
+                               ) -> Dict[str, Channel]:
+        """
+        Extracts the requested channels, reading each data group's records
+        only once.
+        
+        Channels are returned unloaded; their samples are decoded on first
+        access, limited to the requested time windows.
+        """
+        # Resolve every requested channel to its (group, index) first
+        by_group: Dict[int, List[Tuple[str, int]]] = {}
+        for channel_name, (channel_config, _) in requests.items():
+            location = self._resolve_channel(mdf, channel_name, channel_config)
+            if location is not None:
+                group, index = location
+                by_group.setdefault(group, []).append((channel_name, index))
+        
+        # Each group is decoded once, on first access to any of its channels,
+        # and only for the records covering the group's combined time window
+        channels = {}
+        for group, members in by_group.items():
+            window = requests[members[0][0]][1]
+            for channel_name, _ in members[1:]:
+                window = self._merge_windows(window, requests[channel_name][1])
+            
+            reader = RecordRangeReader(
+                mdf, group, [index for _, index in members], *window)
+            for channel_name, index in members:
+                channels[channel_name] = Channel(
+                    name=channel_name,
+                    metadata={'source': self._channel_source(mdf, group, index)},
+                    reader=partial(reader.read, index)
+                )
+        
+        return channels
+
+    def _channel_requests(self, config: Dict[str, Dict]) -> Dict[str, Tuple[Dict, Window]]:
+        """
+        Maps every required channel to the configuration used to resolve it
+        and the time window it is needed for.
+        
+        Setpoint and test flag channels are resolved with the configuration
+        of the first channel referencing them, and cover the windows of all
+        channels referencing them.
+        """
+        requests: Dict[str, Tuple[Dict, Window]] = {}
+        for channel_name, channel_config in self._required_channels(config):
+            window = self._time_window(channel_config)
+            if channel_name in requests:
+                first_config, first_window = requests[channel_name]
+                requests[channel_name] = (first_config,
+                                          self._merge_windows(first_window, window))
+            else:
+                requests[channel_name] = (channel_config, window)
+        return requests
+
+    def _time_window(self, config: Dict) -> Window:
+        """Returns the configured (startTime, endTime), None where unset."""
+        start = config.get('startTime')
+        end = config.get('endTime')
+        return (float(start) if start not in (None, '') else None,
+                float(end) if end not in (None, '') else None)
+
+    def _merge_windows(self, a: Window, b: Window) -> Window:
+        """Returns the smallest window covering both; None means unbounded."""
+        start = None if a[0] is None or b[0] is None else min(a[0], b[0])
+        end = None if a[1] is None or b[1] is None else max(a[1], b[1])
+        return start, end
+
+    def _required_channels(self, config: Dict[str, Dict]) -> List[Tuple[str, Dict]]:
+        """Lists configured channels followed by their setpoint and test flag channels."""
+        required = list(config.items())
+        for channel_config in config.values():
+            for key in ('Sollwertkanal', 'Testflagchannel'):
+                if channel_config.get(key):
+                    required.append((channel_config[key], channel_config))
+        return required
+
+    def _resolve_channel(self, mdf: 'asammdf.MDF', channel_name: str,
+                         config: Dict) -> Optional[Tuple[int, int]]:
+        """
+        Finds the (group, index) of a channel from metadata only, using the
+        back2backID and back2backIDPosition to pick between duplicated
+        channel names via the file's SourceIndex.
+        """
         occurrences = mdf.whereis(channel_name)
         
         if not occurrences:
             self.logger.error(f"Channel {channel_name} not found")
             return None
-
+        
         if len(occurrences) == 1:
-            # Get the group and index from the occurrence tuple
-            group, index = occurrences[0]
-            signal = mdf.get(group=group, index=index)
-        else:
-            signal = self._find_channel_by_id(mdf, occurrences, config)
-            
-        if signal is None:
+            return occurrences[0]
+        
+        back2back_id = config.get('back2backID', '')
+        location = self.cache.source_index(mdf).resolve(
+            channel_name, back2back_id, self._back2back_position(config))
+        if location is None:
+            self.logger.error(f"No source of channel {channel_name} matches {back2back_id}")
+        return location
+
+    def _channel_source(self, mdf: 'asammdf.MDF', group: int, index: int):
+        """Returns the channel's source, falling back to its group's acquisition source."""
+        channel_group = mdf.groups[group]
+        return (channel_group.channels[index].source
+                or channel_group.channel_group.acq_source)
+
+    def _back2back_position(self, config: Dict) -> int:
+        position = config.get('back2backIDPosition')
+        return int(position) if position not in (None, '') else 0
+
+    def _extract_channel(self, mdf: 'asammdf.MDF', channel_name: str, config: Dict) -> Optional[Channel]:
+        location = self._resolve_channel(mdf, channel_name, config)
+        if location is None:
             return None
+        
+        # Only the resolved occurrence is decoded
+        group, index = location
+        signal = mdf.get(group=group, index=index)
             
         return Channel(
             name=channel_name,
             data=signal.samples,
             timestamps=signal.timestamps,
             metadata={'source': signal.source}
-        )
-    
-    def _find_channel_by_id(self, mdf: asammdf.MDF, occurrences: List[Tuple], 
-                           config: Dict) -> Optional[asammdf.Signal]:
-        back2back_id = config.get('back2backID', '')
-        
-        for occ in occurrences:
-            signal = mdf.get(group=occ[0], index=occ[1])
-            if back2back_id in signal.source.name:
-                return signal
-                
-        return None
\ No newline at end of file
+        )
\ No newline at end of file
@@ -0,0 +1,71 @@
+import logging
+from typing import Dict, List, Optional, Tuple, Any, TYPE_CHECKING
+import numpy as np
+
+if TYPE_CHECKING:
+    import asammdf
+
+class RecordRangeReader:
+    """
+    Lazily reads channels of one data group, limited to the records that
+    fall inside a time window.
+
+    The record range is found by binary search on the group's master
+    channel, so only the master is decoded in full. All requested channels
+    of the group are then decoded together on first access.
+    """
+    def __init__(self, mdf: 'asammdf.MDF', group: int, indexes: List[int],
+                 start_time: Optional[float] = None,
+                 end_time: Optional[float] = None):
+        self.logger = logging.getLogger(__name__)
+        self.mdf = mdf
+        self.group = group
+        self.indexes = list(indexes)
+        self.start_time = start_time
+        self.end_time = end_time
+        self._signals: Optional[Dict[int, 'asammdf.Signal']] = None
+        self._empty = False
+
+    def record_range(self) -> Tuple[int, Optional[int]]:
+        """
+        Returns (record_offset, record_count) covering the time window.
+
+        One extra record is kept on either side so that data aligned to
+        another channel's timestamps can be interpolated at the window edges.
+        """
+        if self.start_time is None and self.end_time is None:
+            return 0, None
+
+        master = self.mdf.get_master(self.group)
+        first, last = 0, len(master)
+        if self.start_time is not None:
+            first = max(int(np.searchsorted(master, self.start_time, side='left')) - 1, 0)
+        if self.end_time is not None:
+            last = min(int(np.searchsorted(master, self.end_time, side='right')) + 1,
+                       len(master))
+        return first, max(last - first, 0)
+
+    def read(self, index: int) -> Tuple[np.ndarray, np.ndarray, Dict[str, Any]]:
+        """Returns (samples, timestamps, metadata) for one channel of the group."""
+        if self._signals is None:
+            self._load()
+        signal = self._signals.pop(index)
+        if self._empty:
+            return signal.samples[:0], signal.timestamps[:0], {'source': signal.source}
+        return signal.samples, signal.timestamps, {'source': signal.source}
+
+    def _load(self) -> None:
+        record_offset, record_count = self.record_range()
+        self.logger.debug(
+            f"Reading group {self.group} records {record_offset}"
+            f"+{record_count if record_count is not None else 'all'}")
+
+        # Nothing inside the window; read a single record to keep dtypes
+        self._empty = record_count == 0
+        signals = self.mdf.select(
+            [(None, self.group, index) for index in self.indexes],
+            record_offset=record_offset,
+            record_count=1 if self._empty else record_count,
+            copy_master=False
+        )
+        self._signals = dict(zip(self.indexes, signals))
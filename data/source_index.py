@@ -0,0 +1,62 @@
+import logging
+from typing import Dict, List, Optional, Tuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import asammdf
+
+class SourceIndex:
+    """
+    Per-file index of duplicated channel names by source name.
+
+    Built once from channel and channel group metadata, without decoding
+    any samples. Maps (channel name, back2backID, back2backIDPosition) to
+    the (group, index) of the channel, so that resolving a duplicated
+    channel decodes exactly one signal.
+
+    back2backIDPosition selects between several occurrences whose source
+    name contains the back2backID, counted in file order from 0.
+    """
+    def __init__(self, mdf: 'asammdf.MDF'):
+        self.logger = logging.getLogger(__name__)
+        # Channel name -> [(group, index, source name)] in file order
+        self._occurrences: Dict[str, List[Tuple[int, int, str]]] = {}
+        self._resolved: Dict[Tuple[str, str, int], Optional[Tuple[int, int]]] = {}
+
+        for channel_name, entries in mdf.channels_db.items():
+            if len(entries) < 2:
+                continue
+            self._occurrences[channel_name] = [
+                (group, index, self._source_name(mdf, group, index))
+                for group, index in sorted(entries)
+            ]
+
+    def __len__(self) -> int:
+        return len(self._occurrences)
+
+    def __contains__(self, channel_name: str) -> bool:
+        return channel_name in self._occurrences
+
+    def sources(self, channel_name: str) -> List[str]:
+        """Source names of all occurrences of a duplicated channel."""
+        return [source for _, _, source in self._occurrences.get(channel_name, [])]
+
+    def resolve(self, channel_name: str, back2back_id: str = '',
+                position: int = 0) -> Optional[Tuple[int, int]]:
+        """
+        Returns the (group, index) of the position-th occurrence of
+        channel_name whose source name contains back2back_id, or None.
+        """
+        key = (channel_name, back2back_id, position)
+        if key not in self._resolved:
+            matches = [(group, index)
+                       for group, index, source in self._occurrences.get(channel_name, [])
+                       if back2back_id in source]
+            self._resolved[key] = matches[position] if 0 <= position < len(matches) else None
+        return self._resolved[key]
+
+    def _source_name(self, mdf: 'asammdf.MDF', group: int, index: int) -> str:
+        """Returns the channel's source name, falling back to its group's acquisition source."""
+        channel_group = mdf.groups[group]
+        source = (channel_group.channels[index].source
+                  or channel_group.channel_group.acq_source)
+        return getattr(source, 'name', None) or ''
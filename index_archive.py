@@ -0,0 +1,35 @@
+import argparse
+import logging
+from pathlib import Path
+
+from data.catalog import ChannelCatalog
+
+def index_archive():
+    parser = argparse.ArgumentParser(description="Catalog the channels of an MF4 archive")
+    parser.add_argument('directory', type=Path, help="Archive directory, searched recursively")
+    parser.add_argument('--db', type=Path, default=Path("channels.sqlite"),
+                        help="SQLite catalog file")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Worker processes (default: CPU count)")
+    parser.add_argument('--channel', default=None,
+                        help="After scanning, list the files containing this channel")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(levelname)s - %(message)s')
+
+    catalog = ChannelCatalog(args.db)
+    try:
+        stats = catalog.scan(args.directory, workers=args.workers)
+        print(f"Scanned: {stats['scanned']}, unchanged: {stats['unchanged']}, "
+              f"failed: {stats['failed']}, removed: {stats['removed']}")
+
+        if args.channel:
+            for path, group, source, unit, samples, start, end in catalog.channel_info(args.channel):
+                time_range = f"{start:.3f}-{end:.3f} s" if samples else "no samples"
+                print(f"{path} [group {group}, {source or '-'}] {samples} samples, "
+                      f"{time_range}, unit '{unit}'")
+    finally:
+        catalog.close()
+
+if __name__ == "__main__":
+    index_archive()
@@ -1,15 +1,31 @@
 # Standard library imports
+import argparse
 import logging
+import multiprocessing
 import sys
 from pathlib import Path
-from tkinter import filedialog
 
 # Import our custom modules
-from core.analyzer import MeasurementAnalyzer
-from visualization.report import ReportGenerator
+from cli import build_parser, check_options, collect_inputs, run_batch, run_files
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = build_parser()
+    parser.set_defaults(config=Path("config.xlsx"))
+    parser.add_argument('--data-dir', type=Path, default=Path("data"),
+                        help="Directory with MF4 files, used when no inputs are given")
+    args = parser.parse_args(argv)
+    check_options(parser, args)
+    return args
+
+def ask_open_filename(**options) -> str:
+    """File dialog for interactive use; Tk is only imported here."""
+    from tkinter import filedialog
+    return filedialog.askopenfilename(**options)
 
 def main():
     """Main entry point for the analysis system."""
+    args = parse_args()
+
     # Configure logging
     logging.basicConfig(
         level=logging.INFO,
@@ -17,56 +33,49 @@ def main():
     )
     logger = logging.getLogger(__name__)
 
+    if args.inputs:
+        mf4_files = collect_inputs(args.inputs)
+    elif args.data_dir.is_dir():
+        mf4_files = sorted(args.data_dir.glob("*.mf4"))
+    else:
+        # e.g. started from elsewhere; the file dialog below asks instead
+        mf4_files = []
+
+    if args.batch:
+        if not mf4_files:
+            logger.error(f"No MF4 files found in {args.data_dir}")
+            sys.exit(1)
+        try:
+            sys.exit(run_batch(args, args.config, mf4_files,
+                               [path for path in args.inputs or [args.data_dir]
+                                if path.is_dir()]))
+        except Exception as e:
+            logger.error(f"Analysis system error: {str(e)}")
+            sys.exit(1)
+
     try:
         # Get configuration file
-        config_file = Path("config.xlsx")
+        config_file = args.config
         if not config_file.exists():
-            config_file = Path(filedialog.askopenfilename(
+            config_file = Path(ask_open_filename(
                 filetypes=[("Excel files", "*.xlsx")],
                 title="Select configuration file"
             ))
 
-        # Initialize system components
-        analyzer = MeasurementAnalyzer(config_file)
-        report_generator = ReportGenerator(Path("reports"))
-
         # Get MF4 files to analyze
-        mf4_files = list(Path("data").glob("*.mf4"))
         if not mf4_files:
-            file_path = filedialog.askopenfilename(
+            file_path = ask_open_filename(
                 filetypes=[("MF4 files", "*.mf4")],
                 title="Select MF4 file"
             )
             mf4_files = [Path(file_path)]
 
-        # Process each file
-        for mf4_file in mf4_files:
-            logger.info(f"Processing {mf4_file}")
-            try:
-                # Run analysis
-                results = analyzer.analyze_file(mf4_file)
-                
-                # Generate report
-                report_generator.generate_report(
-                    results,
-                    mf4_file,
-                    analyzer.channels,
-                    analyzer.config
-                )
-                
-                # Print summary
-                passed = sum(1 for r in results.values() if r.passed)
-                total = len(results)
-                print(f"\nResults for {mf4_file.name}:")
-                print(f"Passed: {passed}/{total} channels")
-                
-            except Exception as e:
-                logger.error(f"Failed to process {mf4_file}: {str(e)}", exc_info=True)
-                continue
+        run_files(args, config_file, mf4_files)
 
     except Exception as e:
         logger.error(f"Analysis system error: {str(e)}")
         sys.exit(1)
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()
     main()
\ No newline at end of file
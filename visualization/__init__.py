@@ -1,4 +1,19 @@
-from .plotter import ChannelPlotter
-from .report import ReportGenerator
+import importlib
 
-__all__ = ['ChannelPlotter', 'ReportGenerator']
\ No newline at end of file
+# Imported on first access (PEP 562), as both modules import matplotlib
+_EXPORTS = {
+    'ChannelPlotter': '.plotter',
+    'ReportGenerator': '.report',
+}
+
+__all__ = ['ChannelPlotter', 'ReportGenerator']
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
\ No newline at end of file
@@ -1,13 +1,50 @@
 import logging
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Optional
 import matplotlib.pyplot as plt
 import numpy as np
+from matplotlib.collections import PolyCollection
 from matplotlib.figure import Figure
 
+from core.types import ChannelConfig
+
+def minmax_indices(values: np.ndarray, buckets: int) -> np.ndarray:
+    """
+    Returns sorted indices of the first, last, minimum and maximum sample
+    in each of about buckets equal-count buckets, or all indices if values
+    is short.
+
+    Plotting only these samples draws the same envelope as the full series
+    at a width of up to buckets pixels, so peaks stay visible, and keeps
+    the lines joining neighbouring buckets.
+    """
+    n = len(values)
+    if n <= 4 * buckets:
+        return np.arange(n)
+
+    size = n // buckets
+    body = n - n % size
+    blocks = np.asarray(values[:body]).reshape(-1, size)
+    offsets = np.arange(0, body, size)
+    indices = [offsets, offsets + size - 1,
+               offsets + blocks.argmin(axis=1), offsets + blocks.argmax(axis=1)]
+    if body < n:
+        tail = np.asarray(values[body:])
+        indices.append(np.array([body, n - 1, body + tail.argmin(), body + tail.argmax()]))
+    return np.unique(np.concatenate(indices))
+
 class ChannelPlotter:
-    def __init__(self):
+    """
+    Draws one channel with its thresholds and violations.
+
+    Lines are reduced to the minimum and maximum of each of max_buckets
+    buckets, so drawing time and PDF size do not grow with the sample
+    count. The default keeps more than one bucket per pixel at report
+    resolution.
+    """
+    def __init__(self, max_buckets: int = 2000):
         self.logger = logging.getLogger(__name__)
+        self.max_buckets = max_buckets
         self.colors = {
             'data': 'blue',
             'threshold': 'red',
@@ -15,23 +52,46 @@ class ChannelPlotter:
             'setpoint': 'green'
         }
 
+    def decimate(self, data: np.ndarray, timestamps: np.ndarray,
+                 setpoint_data: Optional[np.ndarray] = None):
+        """
+        Reduces a channel to the samples create_plot draws, e.g. before
+        sending it to another process.
+        
+        Returns:
+            (data, timestamps, setpoint_data, sample_period); pass
+            sample_period to create_plot, as it cannot be derived from the
+            reduced timestamps
+        """
+        period = None
+        if len(timestamps) > 1:
+            period = float(timestamps[-1] - timestamps[0]) / (len(timestamps) - 1)
+        shown = minmax_indices(data, self.max_buckets)
+        if setpoint_data is not None:
+            shown = np.union1d(shown, minmax_indices(setpoint_data, self.max_buckets))
+            setpoint_data = np.asarray(setpoint_data[shown])
+        return np.asarray(data[shown]), np.asarray(timestamps[shown]), setpoint_data, period
+
     def create_plot(self, channel_name: str, data: np.ndarray, 
-                   timestamps: np.ndarray, config: Dict, 
-                   violations: List[Dict]) -> Figure:
+                   timestamps: np.ndarray, config: ChannelConfig, 
+                   segments: np.ndarray,
+                   setpoint_data: Optional[np.ndarray] = None,
+                   sample_period: Optional[float] = None) -> Figure:
         fig, ax = plt.subplots(figsize=(12, 6))
         
         # Plot main data
-        ax.plot(timestamps, data, color=self.colors['data'], 
+        shown = minmax_indices(data, self.max_buckets)
+        ax.plot(timestamps[shown], data[shown], color=self.colors['data'], 
                 label='Measured', linewidth=0.5)
         
         # Plot thresholds
-        if config.get('setpoint_channel'):
-            self._add_dynamic_thresholds(ax, timestamps, data, config)
+        if config.setpoint_channel:
+            self._add_dynamic_thresholds(ax, timestamps, setpoint_data, config)
         else:
             self._add_static_thresholds(ax, timestamps, config)
         
         # Highlight violations
-        self._add_violations(ax, violations)
+        self._add_violations(ax, segments, timestamps, sample_period)
         
         # Setup labels and title
         self._setup_plot(ax, channel_name, config)
@@ -39,8 +99,11 @@ class ChannelPlotter:
         return fig
 
     def _add_dynamic_thresholds(self, ax, timestamps: np.ndarray, 
-                              setpoint_data: np.ndarray, config: Dict) -> None:
-        tolerance = float(config['Toleranz statisch'])
+                              setpoint_data: np.ndarray, config: ChannelConfig) -> None:
+        tolerance = float(config.static_tolerance)
+        # Both bands follow the setpoint, so they share its extremes
+        shown = minmax_indices(setpoint_data, self.max_buckets)
+        timestamps, setpoint_data = timestamps[shown], setpoint_data[shown]
         ax.plot(timestamps, setpoint_data + tolerance, 
                 color=self.colors['threshold'], 
                 linestyle='--', label='Upper Threshold')
@@ -49,24 +112,57 @@ class ChannelPlotter:
                 linestyle='--', label='Lower Threshold')
 
     def _add_static_thresholds(self, ax, timestamps: np.ndarray, 
-                             config: Dict) -> None:
-        setpoint = float(config['Sollwert statisch'])
-        tolerance = float(config['Toleranz statisch'])
+                             config: ChannelConfig) -> None:
+        setpoint = float(config.static_setpoint)
+        tolerance = float(config.static_tolerance)
         
         ax.axhline(y=setpoint + tolerance, color=self.colors['threshold'], 
                    linestyle='--', label='Upper Threshold')
         ax.axhline(y=setpoint - tolerance, color=self.colors['threshold'], 
                    linestyle='--', label='Lower Threshold')
 
-    def _add_violations(self, ax, violations: List[Dict]) -> None:
-        for violation in violations:
-            ax.axvspan(violation['timestamp'] - 0.1, 
-                      violation['timestamp'] + 0.1,
-                      color=self.colors['violation'], 
-                      alpha=0.3)
+    def _add_violations(self, ax, segments: np.ndarray, timestamps: np.ndarray,
+                        sample_period: Optional[float] = None) -> None:
+        """
+        Shades violation segments as a single collection artist.
+
+        Each segment is widened by half a sample period on either side, so
+        single-sample violations stay visible; the period is derived from
+        timestamps unless sample_period is given. Intervals are merged where
+        they overlap or the gap between them is below the plot resolution
+        (1 / max_buckets of the time span), which bounds the number of
+        shaded intervals by max_buckets.
+        """
+        if not len(segments):
+            return
+        
+        period = resolution = 0.0
+        if len(timestamps) > 1:
+            span = float(timestamps[-1] - timestamps[0])
+            period = span / (len(timestamps) - 1) if sample_period is None else sample_period
+            resolution = span / self.max_buckets
+        starts, ends = self._merge_intervals(segments['start_time'] - period / 2,
+                                             segments['end_time'] + period / 2,
+                                             resolution)
+        
+        # x in data coordinates, y spanning the full axes height
+        verts = np.empty((len(starts), 4, 2))
+        verts[:, :, 0] = np.column_stack((starts, starts, ends, ends))
+        verts[:, :, 1] = (0, 1, 1, 0)
+        ax.add_collection(PolyCollection(
+            verts, transform=ax.get_xaxis_transform(),
+            facecolors=self.colors['violation'], edgecolors='none', alpha=0.3),
+            autolim=False)
+
+    def _merge_intervals(self, starts: np.ndarray, ends: np.ndarray, min_gap: float = 0.0):
+        """Merges intervals, given sorted by start, that overlap or are at most min_gap apart."""
+        reach = np.maximum.accumulate(ends)
+        first = np.flatnonzero(np.concatenate(([True], starts[1:] - reach[:-1] > min_gap)))
+        last = np.concatenate((first[1:], [len(starts)])) - 1
+        return starts[first], reach[last]
 
-    def _setup_plot(self, ax, channel_name: str, config: Dict) -> None:
+    def _setup_plot(self, ax, channel_name: str, config: ChannelConfig) -> None:
         ax.set_xlabel('Time (s)')
-        ax.set_ylabel(f'{channel_name} ({config.get("unit", "")})')
+        ax.set_ylabel(f'{channel_name} ({config.unit})')
         ax.grid(True)
         ax.legend()
\ No newline at end of file
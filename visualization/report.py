@@ -1,43 +1,178 @@
 import logging
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, List, Optional
+import numpy as np
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_pdf import PdfPages
 from datetime import datetime
 
+from core.instrumentation import Instrumentation
 from .plotter import ChannelPlotter
 
+# Per-process plotter, built once by _init_render_worker
+_plotter = None
+
+def _init_render_worker() -> None:
+    global _plotter
+    import matplotlib
+    matplotlib.use('Agg')
+    _plotter = ChannelPlotter()
+
+def _render_page(channel_name: str, data: np.ndarray, timestamps: np.ndarray,
+                 config, segments: np.ndarray, setpoint_data: Optional[np.ndarray],
+                 sample_period: Optional[float], dpi: int) -> np.ndarray:
+    """Renders one channel page and returns it as an RGBA pixel array."""
+    fig = _plotter.create_plot(
+        channel_name, data, timestamps, config, segments, setpoint_data, sample_period)
+    try:
+        fig.set_dpi(dpi)
+        fig.canvas.draw()
+        return np.array(fig.canvas.buffer_rgba())
+    finally:
+        plt.close(fig)
+
 class ReportGenerator:
-    def __init__(self, output_dir: Path):
+    """
+    Writes one PDF report per analyzed file: a summary page followed by
+    one page per channel, in configuration order.
+
+    With workers > 1, channel pages are rendered on a process pool with
+    the Agg backend and embedded as images of the given dpi; otherwise
+    they are drawn in-process as vector graphics. Channels are decimated
+    before being sent to the pool, and at most two pages per worker are
+    in flight, which bounds the memory held for a report. A channel that
+    fails to render is logged and left out of the report.
+
+    With an enabled Instrumentation, each report is traced as a 'report'
+    span with 'summary' and per-channel 'plot' spans ('render' when
+    rendering in parallel).
+    """
+    def __init__(self, output_dir: Path, workers: int = 1, dpi: int = 150,
+                 instrumentation: Optional[Instrumentation] = None):
         self.output_dir = output_dir
         self.logger = logging.getLogger(__name__)
         self.plotter = ChannelPlotter()
+        self.workers = workers or os.cpu_count() or 1
+        self.dpi = dpi
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self.instrumentation = instrumentation or Instrumentation(enabled=False)
+
+    def close(self) -> None:
+        """Shuts down the render pool, if one was started."""
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def report_path(self, mf4_file: Path) -> Path:
+        """Path of the PDF report for mf4_file."""
+        return self.output_dir / f"{Path(mf4_file).stem}_report.pdf"
 
     def generate_report(self, results: Dict, mf4_file: Path, 
                        channels: Dict, configs: Dict) -> None:
-        output_file = self.output_dir / f"{mf4_file.stem}_report.pdf"
+        output_file = self.report_path(mf4_file)
         self.output_dir.mkdir(parents=True, exist_ok=True)
 
-        with PdfPages(output_file) as pdf:
+        plotted = []
+        for channel_name in results:
+            if channel_name not in channels:
+                # e.g. streaming analysis, which keeps no channel data
+                self.logger.info(f"No data to plot for {channel_name}")
+                continue
+            plotted.append(channel_name)
+
+        with self.instrumentation.span('report', file=str(mf4_file), channels=len(plotted)), \
+                PdfPages(output_file) as pdf:
             # Add summary page
-            self._add_summary_page(pdf, results, mf4_file)
+            with self.instrumentation.span('summary'):
+                self._add_summary_page(pdf, results, mf4_file)
             
             # Add individual channel plots
-            for channel_name, result in results.items():
+            if self.workers > 1 and len(plotted) > 1:
+                with self.instrumentation.span('render', workers=self.workers):
+                    self._add_rendered_pages(pdf, plotted, results, channels, configs)
+                return
+
+            for channel_name in plotted:
                 try:
-                    fig = self.plotter.create_plot(
-                        channel_name,
-                        channels[channel_name].data,
-                        channels[channel_name].timestamps,
-                        configs[channel_name],
-                        result.violations
-                    )
-                    pdf.savefig(fig)
-                    plt.close(fig)
+                    with self.instrumentation.span(
+                            'plot', channel=channel_name,
+                            samples=len(channels[channel_name].timestamps)):
+                        fig = self.plotter.create_plot(
+                            *self._plot_args(channel_name, results, channels, configs))
+                        pdf.savefig(fig)
+                        plt.close(fig)
                 except Exception as e:
                     self.logger.error(
                         f"Failed to create plot for {channel_name}: {str(e)}")
 
+    def _plot_args(self, channel_name: str, results: Dict, channels: Dict,
+                   configs: Dict) -> tuple:
+        channel = channels[channel_name]
+        return (
+            channel_name,
+            channel.data,
+            channel.timestamps,
+            configs[channel_name],
+            results[channel_name].segments,
+            channel.metadata.get('setpoint')
+        )
+
+    def _add_rendered_pages(self, pdf: PdfPages, plotted: List[str], results: Dict,
+                            channels: Dict, configs: Dict) -> None:
+        """Renders channel pages in parallel and adds them in the given order."""
+        pending = deque()
+        for channel_name in plotted:
+            try:
+                pending.append((channel_name, *self._submit_page(
+                    channel_name, results, channels, configs)))
+            except Exception as e:
+                self.logger.error(f"Failed to create plot for {channel_name}: {str(e)}")
+            if len(pending) >= 2 * self.workers:
+                self._add_rendered_page(pdf, *pending.popleft())
+        while pending:
+            self._add_rendered_page(pdf, *pending.popleft())
+
+    def _submit_page(self, channel_name: str, results: Dict, channels: Dict,
+                     configs: Dict) -> tuple:
+        """Submits a decimated channel page; returns (pool, future)."""
+        name, data, timestamps, config, segments, setpoint_data = self._plot_args(
+            channel_name, results, channels, configs)
+        data, timestamps, setpoint_data, period = self.plotter.decimate(
+            data, timestamps, setpoint_data)
+        args = (name, data, timestamps, config, segments, setpoint_data, period, self.dpi)
+        if self._pool is not None:
+            try:
+                return self._pool, self._pool.submit(_render_page, *args)
+            except BrokenProcessPool:
+                # A worker died while an earlier page was rendered
+                self._pool.shutdown(wait=False)
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.workers, initializer=_init_render_worker)
+        return self._pool, self._pool.submit(_render_page, *args)
+
+    def _add_rendered_page(self, pdf: PdfPages, channel_name: str,
+                           pool: ProcessPoolExecutor, future) -> None:
+        try:
+            pixels = future.result()
+        except Exception as e:
+            self.logger.error(
+                f"Failed to create plot for {channel_name}: {str(e)}")
+            if isinstance(e, BrokenProcessPool) and self._pool is pool:
+                # A worker died; start a fresh pool for the next page
+                pool.shutdown(wait=False)
+                self._pool = None
+            return
+
+        height, width = pixels.shape[:2]
+        fig = plt.figure(figsize=(width / self.dpi, height / self.dpi), dpi=self.dpi)
+        fig.figimage(pixels, origin='upper')
+        pdf.savefig(fig, dpi=self.dpi)
+        plt.close(fig)
+
     def _add_summary_page(self, pdf: PdfPages, results: Dict, 
                          mf4_file: Path) -> None:
         fig, ax = plt.subplots(figsize=(12, 8))
@@ -56,6 +191,17 @@ class ReportGenerator:
             f"Failed: {total - passed}",
         ]
         
+        # List excursions of failed channels
+        failed = [r for r in results.values() if not r.passed]
+        if failed:
+            summary.append("")
+        for result in failed:
+            summary.append(
+                f"{result.channel_name}: {len(result.segments)} excursions, "
+                f"{result.violation_count} samples, "
+                f"max deviation {result.max_deviation:.3g}, "
+                f"evaluated {result.evaluated_duration:.1f} s")
+        
         ax.text(0.5, 0.5, '\n'.join(summary), 
                 ha='center', va='center', fontsize=12)
         
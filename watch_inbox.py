@@ -0,0 +1,69 @@
+import argparse
+import logging
+import multiprocessing
+import os
+from pathlib import Path
+
+from core.daemon import InboxDaemon
+
+def watch_inbox():
+    parser = argparse.ArgumentParser(
+        description="Analyze MF4 files as they arrive in an inbox directory")
+    parser.add_argument('inbox', type=Path, help="Directory the test benches write to")
+    parser.add_argument('--config', type=Path, default=Path("config.xlsx"),
+                        help="Configuration workbook, reloaded when it changes")
+    parser.add_argument('--processed-dir', type=Path, default=Path("processed"),
+                        help="Analyzed files are moved here")
+    parser.add_argument('--failed-dir', type=Path, default=Path("failed"),
+                        help="Files that could not be analyzed are moved here")
+    parser.add_argument('--report-dir', type=Path, default=Path("reports"),
+                        help="Directory for PDF reports")
+    parser.add_argument('--no-pdf', action='store_true', help="Do not generate PDF reports")
+    parser.add_argument('--export-dir', type=Path, default=None,
+                        help="Write JSON/CSV/NPZ results to this directory")
+    parser.add_argument('--result-dir', type=Path, default=None,
+                        help="Store results here and reuse them for unchanged "
+                             "files and configuration rows")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Worker processes (default: CPU count)")
+    parser.add_argument('--queue-size', type=int, default=None,
+                        help="Files queued ahead of the workers (default: 2 per worker)")
+    parser.add_argument('--poll-interval', type=float, default=2.0,
+                        help="Seconds between inbox scans")
+    parser.add_argument('--stable-seconds', type=float, default=5.0,
+                        help="A file is picked up once unchanged for this long")
+    parser.add_argument('--retries', type=int, default=2,
+                        help="Retries of a file whose analysis failed with an error")
+    parser.add_argument('--retry-delay', type=float, default=30.0,
+                        help="Seconds before the first retry, doubled for each further one")
+    parser.add_argument('--status-file', type=Path, default=Path("status.json"),
+                        help="JSON file with queue depth, counters and throughput")
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+    cache_dir = os.environ.get('MEASUREMENT_CACHE_DIR')
+    InboxDaemon(
+        args.config,
+        args.inbox,
+        args.processed_dir,
+        args.failed_dir,
+        report_dir=None if args.no_pdf else args.report_dir,
+        export_dir=args.export_dir,
+        result_dir=args.result_dir,
+        cache_dir=Path(cache_dir) if cache_dir else None,
+        workers=args.workers,
+        queue_size=args.queue_size,
+        poll_interval=args.poll_interval,
+        stable_seconds=args.stable_seconds,
+        retries=args.retries,
+        retry_delay=args.retry_delay,
+        status_file=args.status_file
+    ).run()
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    watch_inbox()